@@ -0,0 +1,35 @@
+"""
+packs every image in the assets directory into the atlas the game loads its sprites from:
+
+    python -m src.atlas
+
+the game packs it itself when it is missing or out of date, this does it ahead of time
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Optional
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from src.models.assets import __path__ as assets, ATLAS_FILE
+from src.models.atlas import build_atlas
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.parse_args(argv)
+
+    start = time.perf_counter()
+    path = assets / ATLAS_FILE
+    atlas = build_atlas(assets, path)
+    print(f"{len(atlas.rects)} images packed into {atlas.image.get_width()}x{atlas.image.get_height()}, "
+          f"{path.stat().st_size} bytes in {path} ({time.perf_counter() - start:.2f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,205 @@
+"""
+timings for the hot paths, run headless on the shipped board, on bigger boards made by tiling it and on generated
+mazes:
+
+    python -m src.benchmark --out results.json
+    python -m src.benchmark --mazes 2000x1000 4000x4000
+    python -m src.benchmark --baseline results.json
+
+every number is milliseconds per call.  with --baseline the run is compared against an earlier --out file and the exit
+code is 1 if anything got slower by more than --tolerance
+"""
+from __future__ import annotations
+
+import argparse
+import dataclasses
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+from typing import Callable, Optional
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import numpy as np
+import pygame as pg
+
+from src.main import default_config
+from src.models.assets import fetch_surface, array_from_mask
+from src.models.config import *
+from src.models.corridors import CorridorGraph
+from src.models.headless import Simulation, wander
+from src.models.hierarchy import Hierarchy
+from src.models.maze import generate_maze
+from src.models.pathfind import SortingPath, boundary_matrix, cross_sections
+
+__all__ = ("tiled", "run_benchmarks", "compare")
+
+
+def tiled(surface: pg.Surface, times: int) -> pg.Surface:
+    """surface repeated times by times"""
+    s = pg.Surface((surface.get_width() * times, surface.get_height() * times), flags=pg.SRCALPHA)
+    pg.surfarray.pixels3d(s)[...] = np.tile(pg.surfarray.array3d(surface), (times, times, 1))
+    pg.surfarray.pixels_alpha(s)[...] = np.tile(pg.surfarray.array_alpha(surface), (times, times))
+    return s
+
+
+def _timed(func: Callable[[], object], repeat: int) -> list[float]:
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def _summary(samples: list[float], per: int = 1) -> dict[str, float]:
+    """:param per: calls in each sample"""
+    samples = [x / per for x in samples]
+    return {"calls": len(samples) * per, "mean": statistics.fmean(samples), "median": statistics.median(samples),
+            "min": min(samples)}
+
+
+def _benchmark_board(information: pg.Surface, surface: pg.Surface, pairs: int, ticks: int, repeat: int,
+                     seed: int) -> dict[str, dict[str, float]]:
+    rng = random.Random(seed)
+    grid_size = global_config().grid_size
+    results = {}
+
+    data = BoardData.from_surface(information)
+    results["from_surface"] = _summary(_timed(lambda: BoardData.from_surface(information), repeat))
+
+    matrix = boundary_matrix(array_from_mask(data.ghost_mask), grid_size)
+    results["cross_sections"] = _summary(_timed(lambda: cross_sections(matrix, grid_size), repeat))
+
+    vertices = list(data.boundary._vertices)  # NOQA
+    chosen = [(rng.choice(vertices), rng.choice(vertices)) for _ in range(pairs)]
+    for mode in SortingPath:
+        samples = []
+        for start, end in chosen:
+            samples.extend(_timed(lambda: data.boundary.get_path(start, end, mode), 1))
+        results[f"get_path.{mode.name.lower()}"] = _summary(samples)
+
+    start = time.perf_counter()
+    hierarchy = Hierarchy(data.boundary, 16)
+    results["hierarchy_build"] = _summary([(time.perf_counter() - start) * 1000])
+    samples = []
+    for start, end in chosen:
+        samples.extend(_timed(lambda: hierarchy.get_path(start, end), 1))
+    results["get_path.hierarchical"] = _summary(samples)
+
+    corridors = CorridorGraph(data.boundary)
+    samples = []
+    for start, end in chosen:
+        samples.extend(_timed(lambda: corridors.get_path(start, end), 1))
+    results["get_path.contracted"] = _summary(samples)
+
+    random.seed(seed)
+    simulation = Simulation(data, controller=wander, surface=surface)
+    board = simulation.board
+    board.get_surface()  # the pickups are drawn into their layer the first time
+    results["get_surface"] = _summary(_timed(board.get_surface, repeat))
+
+    width, height = surface.get_size()
+    mask = board.pacman.mask
+    positions = [(rng.randrange(width), rng.randrange(height)) for _ in range(1000)]
+
+    def collide_all() -> None:
+        for position in positions:
+            board.collides_with_wall(mask, position)
+    results["collides_with_wall"] = _summary(_timed(collide_all, repeat), per=len(positions))
+
+    samples = []
+    for _ in range(ticks):
+        if board.is_over:  # caught, the rest of the ticks are run on a fresh board
+            random.seed(rng.random())
+            simulation = Simulation(data, controller=wander, surface=surface)
+            board = simulation.board
+        samples.extend(_timed(simulation.step, 1))
+    results["update"] = _summary(samples)
+    return results
+
+
+def run_benchmarks(sizes: tuple[int, ...] = (1, 2, 4), pairs: int = 20, ticks: int = 300, repeat: int = 5,
+                   seed: int = 0, mazes: tuple[tuple[int, int], ...] = ()) -> dict:
+    """
+    :param sizes: how many times the shipped board is tiled in each direction, 1 is the board itself
+    :param mazes: sizes of generated mazes to run on as well
+    :param pairs: random vertex pairs searched with each SortingPath
+    :return: environment information under "meta" and the summaries under "results", keyed board/benchmark
+    """
+    set_global_config(dataclasses.replace(default_config(), debug=Debug()))
+    pg.display.init()
+    pg.display.set_mode((1, 1))  # Board.get_surface converts to the display format
+    information = fetch_surface(global_config().board.information_path)
+    surface = global_config().board_surface
+
+    boards = {("shipped" if size == 1 else f"tiled{size}x{size}"): (tiled(information, size), tiled(surface, size))
+              for size in sizes}
+    for width, height in mazes:
+        maze = generate_maze((width, height), seed=seed)
+        boards[f"maze{width}x{height}"] = maze.information, maze.board
+
+    results = {}
+    for name, (board_information, board_surface) in boards.items():
+        for benchmark, summary in _benchmark_board(board_information, board_surface, pairs, ticks, repeat,
+                                                   seed).items():
+            results[f"{name}/{benchmark}"] = summary
+    return {
+        "meta": {
+            "python": platform.python_version(), "numpy": np.__version__, "pygame": pg.version.ver,
+            "machine": platform.machine(), "sizes": list(sizes), "mazes": [list(m) for m in mazes], "pairs": pairs,
+            "ticks": ticks, "repeat": repeat, "seed": seed,
+        },
+        "results": results,
+    }
+
+
+def compare(current: dict, baseline: dict, tolerance: float = .1) -> list[tuple[str, float, float, bool]]:
+    """
+    :param tolerance: how much slower the median can get before it counts as a regression, .1 is 10%
+    :return: (benchmark, baseline median, current median, regressed) for every benchmark in both runs
+    """
+    rows = []
+    for name, summary in current["results"].items():
+        if (old := baseline["results"].get(name)) is not None:
+            rows.append((name, old["median"], summary["median"], summary["median"] > old["median"] * (1 + tolerance)))
+    return rows
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--out", help="where the results are written as json")
+    parser.add_argument("--baseline", help="results of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=.1)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--mazes", nargs="*", default=[], metavar="WxH")
+    parser.add_argument("--pairs", type=int, default=20)
+    parser.add_argument("--ticks", type=int, default=300)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    mazes = tuple(tuple(int(x) for x in maze.lower().split("x")) for maze in args.mazes)
+    current = run_benchmarks(tuple(args.sizes), args.pairs, args.ticks, args.repeat, args.seed, mazes)
+    if args.out:
+        with open(args.out, "w") as f:
+            json.dump(current, f, indent=2)
+    if not args.baseline:
+        for name, summary in current["results"].items():
+            print(f"{name:<40} {summary['median']:>12.4f} ms")
+        return 0
+
+    with open(args.baseline) as f:
+        rows = compare(current, json.load(f), args.tolerance)
+    for name, old, new, regressed in rows:
+        print(f"{name:<40} {old:>12.4f} {new:>12.4f} {new / old if old else float('inf'):>7.2f}x"
+              f"{'  slower' if regressed else ''}")
+    return int(any(regressed for *_, regressed in rows))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
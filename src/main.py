@@ -3,8 +3,8 @@ from src.models.config import *
 from src.models.goals import *
 
 
-def main():
-    c = Config(
+def default_config() -> Config:
+    return Config(
         screen_dimensions=(1150, 500),
         ghost_speed=1.25,
         ghost_aggression=10,
@@ -47,7 +47,10 @@ def main():
             ),
         ]
     )
-    set_global_config(c)
+
+
+def main():
+    set_global_config(default_config())
     window = Window()
 
     window.run()
@@ -1,15 +1,92 @@
+import dataclasses
+import hashlib
+import os
 from pathlib import Path
 from functools import cache
 
 
+import numpy as np
 import pygame as pg
 
+from src.models.atlas import Atlas, load_atlas
+
 
 __path__ = (Path(__file__).parent.parent.parent / "assets").absolute()
+ATLAS_FILE = "sprites.atlas"
+
+
+def asset_file(path: str | bytes) -> Path:
+    p = (__path__ / path)
+    return p if p.exists() else Path(path)
+
+
+def asset_digest(path: str | bytes, *extra) -> str:
+    """hashes the contents of an asset together with anything else derived data depends on"""
+    h = hashlib.sha1(asset_file(path).read_bytes())
+    h.update(repr(extra).encode())
+    return h.hexdigest()
+
+
+def asset_name(path: str | bytes) -> str:
+    """path relative to the assets directory, the name an image is packed under in the atlas"""
+    p = Path(os.fsdecode(path))
+    return (p.relative_to(__path__) if p.is_absolute() and p.is_relative_to(__path__) else p).as_posix()
+
+
+@cache
+def atlas() -> Atlas:
+    """every image in the assets directory, read from a single file.  see atlas.py"""
+    return load_atlas(__path__, __path__ / ATLAS_FILE)
+
+
+def asset_names(directory: str) -> list[str]:
+    """the images directly in a directory of the assets"""
+    return atlas().names(directory)
 
 
 @cache
 def fetch_surface(path: str | bytes) -> pg.Surface:
-    p = (__path__ / path)
-    p = str(p) if p.exists() else path
-    return pg.image.load(p).convert_alpha()
+    if (surface := atlas().get(asset_name(path))) is not None:
+        return surface
+    surface = pg.image.load(str(asset_file(path)))
+    if pg.display.get_surface() is None:  # headless, there is no pixel format to convert to
+        return surface
+    return surface.convert_alpha()
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class Frame:
+    surface: pg.Surface
+    mask: pg.mask.Mask
+
+
+ANGLES = (0, 90, 180, -90)
+
+
+@cache
+def sprite_frames(path: str) -> dict[int, Frame]:
+    """every right angle rotation of a sprite and its mask, made once so nothing is transformed while playing"""
+    surface = fetch_surface(path)
+    frames = {}
+    for angle in ANGLES:
+        rotated = surface if angle == 0 else pg.transform.rotate(surface, angle)
+        frames[angle] = Frame(rotated, pg.mask.from_surface(rotated, 1))
+    return frames
+
+
+def preload(paths: list[str]) -> None:
+    """builds the frames and masks of sprites now rather than when they're first drawn"""
+    for path in paths:
+        sprite_frames(path)
+
+
+def mask_from_array(array: np.ndarray) -> pg.mask.Mask:  # [x][y]
+    surface = pg.Surface(array.shape, flags=pg.SRCALPHA)
+    surface.fill((0, 0, 0, 0))
+    pg.surfarray.pixels_alpha(surface)[array] = 255
+    return pg.mask.from_surface(surface, 1)
+
+
+def array_from_mask(mask: pg.mask.Mask) -> np.ndarray:  # [x][y]
+    surface = mask.to_surface(setcolor=(255, 255, 255, 255), unsetcolor=(0, 0, 0, 0))
+    return pg.surfarray.array_alpha(surface) > 0
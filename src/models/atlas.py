@@ -0,0 +1,141 @@
+"""
+every image under the assets directory packed into one, so starting the game reads a single file:
+
+    MAGIC | header length (u32) | json header | png
+
+the header holds the key the atlas was packed for and the rect of every image in the png, by its path relative to the
+assets directory.  the key only looks at the sizes and modification times of the sources, so checking it reads none of
+them
+"""
+from __future__ import annotations
+
+import hashlib
+import io
+import json
+import os
+import struct
+from pathlib import Path
+from typing import Optional
+
+import pygame as pg
+
+__all__ = ("Atlas", "atlas_sources", "atlas_key", "pack", "write_atlas", "read_atlas", "build_atlas", "load_atlas")
+
+MAGIC = b"PACATLAS\x01"
+_MIN_WIDTH = 1024
+
+
+class Atlas:
+    def __init__(self, key: str, image: pg.Surface, rects: dict[str, pg.Rect]):
+        self.key = key
+        self.image = image
+        self.rects = rects
+        self._converted: Optional[pg.Surface] = None
+
+    def get(self, name: str) -> Optional[pg.Surface]:
+        """
+        a subsurface of the atlas, in the display's format once there is a display
+
+        :return: None if name wasn't packed
+        """
+        if (rect := self.rects.get(name)) is None:
+            return None
+        if self._converted is None and pg.display.get_surface() is not None:
+            self._converted = self.image.convert_alpha()
+        return (self.image if self._converted is None else self._converted).subsurface(rect)
+
+    def names(self, directory: str) -> list[str]:
+        """the images packed from directory, not from the directories in it"""
+        prefix = directory.strip("/") + "/"
+        return [name for name in self.rects if name.startswith(prefix) and "/" not in name[len(prefix):]]
+
+
+def atlas_sources(root: Path) -> dict[str, Path]:
+    """every png under root by its path relative to root, sorted"""
+    return {path.relative_to(root).as_posix(): path for path in sorted(root.rglob("*.png"))}
+
+
+def atlas_key(sources: dict[str, Path]) -> str:
+    h = hashlib.sha1()
+    for name, path in sources.items():
+        stat = path.stat()
+        h.update(repr((name, stat.st_size, stat.st_mtime_ns)).encode())
+    return h.hexdigest()
+
+
+def pack(surfaces: dict[str, pg.Surface]) -> tuple[pg.Surface, dict[str, pg.Rect]]:
+    """
+    places the surfaces on shelves, tallest first, in an image as wide as the widest of them or _MIN_WIDTH
+
+    :return: the image and where each surface is in it
+    """
+    width = max([_MIN_WIDTH, *(s.get_width() for s in surfaces.values())])
+    rects: dict[str, pg.Rect] = {}
+    x = y = shelf = 0
+    for name in sorted(surfaces, key=lambda n: (-surfaces[n].get_height(), n)):
+        w, h = surfaces[name].get_size()
+        if x + w > width:
+            x, y, shelf = 0, y + shelf, 0
+        rects[name] = pg.Rect(x, y, w, h)
+        x += w
+        shelf = max(shelf, h)
+
+    image = pg.Surface((width, max(y + shelf, 1)), flags=pg.SRCALPHA)
+    image.fill((0, 0, 0, 0))
+    for name, rect in rects.items():
+        image.blit(surfaces[name], rect, special_flags=pg.BLEND_RGBA_MAX)  # onto nothing, so the pixels are copied
+    return image, dict(sorted(rects.items()))
+
+
+def write_atlas(path: Path, key: str, image: pg.Surface, rects: dict[str, pg.Rect]) -> None:
+    png = io.BytesIO()
+    pg.image.save(image, png, "atlas.png")
+    header = json.dumps({"key": key, "rects": {name: tuple(rect) for name, rect in rects.items()}}).encode()
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header + png.getvalue())
+    os.replace(tmp, path)
+
+
+def read_atlas(path: Path, key: Optional[str] = None) -> Optional[Atlas]:
+    """
+    :return: None if there is no atlas at path, it's damaged or, when key is given, it was packed for another key
+    """
+    try:
+        data = path.read_bytes()
+    except OSError:
+        return None
+    if not data.startswith(MAGIC):
+        return None
+    try:
+        length, = struct.unpack_from("<I", data, len(MAGIC))
+        start = len(MAGIC) + 4
+        header = json.loads(data[start:start + length])
+        if key is not None and header["key"] != key:
+            return None
+        rects = {name: pg.Rect(rect) for name, rect in header["rects"].items()}
+        image = pg.image.load(io.BytesIO(data[start + length:]), "atlas.png")
+    except (struct.error, ValueError, KeyError, TypeError, AttributeError, pg.error):
+        return None  # packed again like a stale one
+    if not all(image.get_rect().contains(rect) for rect in rects.values()):
+        return None
+    return Atlas(header["key"], image, rects)
+
+
+def build_atlas(root: Path, path: Path) -> Atlas:
+    """packs every png under root and writes the atlas to path"""
+    sources = atlas_sources(root)
+    key = atlas_key(sources)
+    image, rects = pack({name: pg.image.load(str(source)) for name, source in sources.items()})
+    try:
+        write_atlas(path, key, image, rects)
+    except OSError:
+        pass  # a read only asset directory only costs the next start
+    return Atlas(key, image, rects)
+
+
+def load_atlas(root: Path, path: Path) -> Atlas:
+    """the atlas at path, packed again first if it is missing or any image under root changed"""
+    if (atlas := read_atlas(path, atlas_key(atlas_sources(root)))) is not None:
+        return atlas
+    return build_atlas(root, path)
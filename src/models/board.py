@@ -1,11 +1,24 @@
 import functools
 import random
+from typing import Optional
 
+import numpy as np
 import pygame as pg
 
-from src.models.assets import fetch_surface
+from src.models.assets import asset_file, asset_digest, array_from_mask, ANGLES
+from src.models.clock import Clock
+from src.models.compiled import compiled_board_data
 from src.models.config import *
-from src.models.entity import PacMan, SimpleSprite, Ghost
+from src.models.corridors import CorridorGraph
+from src.models.entity import PacMan, SimpleSprite, Ghost, get_pool
+from src.models.hierarchy import Hierarchy
+from src.models.lod import LodScheduler
+from src.models.pathfind import FlowField, PathCache, normalize
+from src.models.pathservice import PathService
+from src.models.profiling import profiled, profiler
+from src.models.renderer import PickupLayer
+from src.models.spatial import SpatialIndex
+from src.models.swarm import GhostSwarm, GhostView
 
 """@dataclasses.dataclass()
 class _Cell:  # this is for an optimization for collision which is probably really dumb... but idc
@@ -35,27 +48,82 @@ def collect_walls(surface: pg.Surface, wall_color: Color) -> list[pg.Rect]:  # f
 """
 
 
+def load_board_data() -> BoardData:
+    information_path = global_config().board.information_path
+    data = compiled_board_data(information_path)
+    if global_config().precompute_paths:
+        data.boundary.precompute(asset_file(information_path).with_suffix(".paths.npz"),
+                                 asset_digest(information_path, global_config().grid_size))
+    if global_config().path_cluster_size:
+        data.boundary.hierarchy = Hierarchy(data.boundary, global_config().path_cluster_size,
+                                            global_config().path_refine_segments)
+    if global_config().contract_corridors:
+        data.boundary.corridors = CorridorGraph(data.boundary)
+    if global_config().path_cache_size:
+        data.boundary.cache = PathCache(global_config().path_cache_size)
+    return data
+
+
 class Board:
-    def __init__(self):
-        self.surface = global_config().board_surface.copy()
-        self.data = BoardData.from_surface(fetch_surface(global_config().board.information_path))
+    def __init__(self, data: Optional[BoardData] = None, clock: Clock = pg.time.get_ticks, pool=None,
+                 surface: Optional[pg.Surface] = None):
+        """
+        :param data: an already loaded board, by default the configured information asset is loaded
+        :param clock: every timer on the board reads this
+        :param pool: runs the ghosts' pathfinding, anything with ThreadPool's apply_async or a PathService.  defaults to
+        get_pool(), or a PathService when Config.process_pathfinding is set
+        :param surface: the background, the configured board asset by default.  it has to match data's size
+        """
+        self.clock = clock
+        self.is_over = False
+        self.surface = (global_config().board_surface if surface is None else surface).copy()
+        self.data = load_board_data() if data is None else data
+        if pool is None and global_config().process_pathfinding:
+            pool = PathService(self.data.boundary, global_config().pool_processes)
+        self.pool = get_pool() if pool is None else pool
 
-        self.scatters: list[SimpleSprite] = [SimpleSprite.scatter_at(pos) for pos in self.data.scatter_points]
-        self.points = [SimpleSprite.point_at(x) for x in self.data.points_points]
+        grid_size = global_config().grid_size
+        self.scatters: SpatialIndex[SimpleSprite] = SpatialIndex(
+            grid_size, (SimpleSprite.scatter_at(pos) for pos in self.data.scatter_points))
+        self.points: SpatialIndex[SimpleSprite] = SpatialIndex(
+            grid_size, (SimpleSprite.point_at(x) for x in self.data.points_points))
+        self.pickups = PickupLayer(self.surface.get_size())  # built the first time the board is drawn
         self.mode: Mode = "chase"
         self.pacman = PacMan(random.choice(self.data.pacman_spawn_locations))
-        self.time_since_chase = pg.time.get_ticks()
+        self.time_since_chase = self.clock()
+
+        self.swarm: Optional[GhostSwarm] = None
+        if global_config().batched_ghosts:
+            self.swarm = GhostSwarm.from_data(self.data, global_config().ghost_count)
+            self.ghosts: list[Ghost | GhostView] = self.swarm.views
+        else:
+            self.ghosts = Ghost.ghosts_from_data(self.data)
+        self.lod: Optional[LodScheduler] = None
+        if global_config().lod_distances or global_config().max_path_requests or global_config().path_budget:
+            self.lod = LodScheduler.from_config()
+        self._walkable: dict[tuple[int, bool], tuple[pg.mask.Mask, np.ndarray]] = {}
+        for angle in ANGLES:  # a convolution each, done now rather than on pacman's first turn that way
+            self.walkable(self.pacman.rotated(angle).mask)
+        self._flow_field: Optional[FlowField] = None
 
-        self.ghosts: list[Ghost] = Ghost.ghosts_from_data(self.data)
+    def walkable(self, mask: pg.mask.Mask, is_ghost: bool = False) -> np.ndarray:
+        """
+        [x][y] whether mask fits with its top left at x, y without touching a wall or leaving the board.  worked out
+        with one convolution the first time a mask is seen, rotated frames have masks of their own
+        """
+        key = (id(mask), is_ghost)
+        if (found := self._walkable.get(key)) is None:
+            walls = self.data.ghost_mask if is_ghost else self.data.pacman_mask
+            (w, h), (width, height) = mask.get_size(), walls.get_size()
+            # bit (x, y) of the convolution is set when mask overlaps the walls with its bottom right at x, y
+            blocked = array_from_mask(walls.convolve(mask))[w - 1:width, h - 1:height]
+            found = self._walkable[key] = mask, ~blocked  # holding the mask keeps its id from being reused
+        return found[1]
 
     def collides_with_wall(self, mask: pg.mask.Mask, position: Point, is_ghost: bool = False) -> bool:
-        rect = mask.get_rect().copy()
-        rect.x, rect.y = position
-        if rect.x < 0 or rect.x + rect.w > self.surface.get_width() or rect.y < 0 or rect.y\
-                + rect.h > self.surface.get_height():
-            return True
-        p_mask = self.data.ghost_mask if is_ghost else self.data.pacman_mask
-        return p_mask.overlap(mask, offset=position)
+        walkable = self.walkable(mask, is_ghost)
+        x, y = round(position[0]), round(position[1])  # as advance_if_able does, positions are floats
+        return not (0 <= x < walkable.shape[0] and 0 <= y < walkable.shape[1] and walkable[x, y])
 
     @staticmethod
     @functools.cache
@@ -69,21 +137,28 @@ class Board:
         s.set_alpha(80)
         return s
 
-    def get_surface(self) -> pg.Surface:
-        s = self.surface.copy().convert_alpha()
-        perc_scatter_done = (pg.time.get_ticks() - self.time_since_chase) / global_config().scatter_duration
+    def ghost_surface(self, ghost: Ghost) -> pg.Surface:
+        perc_scatter_done = (self.clock() - self.time_since_chase) / global_config().scatter_duration
+        if self.mode == "chase" or (r := int(perc_scatter_done * 100)) % 2 == 0 and r >= 80:
+            return ghost.surface
+        return ghost.rotated(90).surface
 
-        for x in self.ghosts:
-            if self.mode == "chase" or (r := int(perc_scatter_done * 100)) % 2 == 0 and r >= 80:
-                s.blit(x.surface, x.pos)
-            else:
-                s.blit(pg.transform.rotate(x.surface, 90), x.pos)
+    def draw(self, s: pg.Surface, area: Optional[pg.Rect] = None) -> None:
+        """
+        draws everything on top of the background onto s
 
-        for x in self.scatters:
-            s.blit(x.surface, x.pos)
+        :param area: when given only what overlaps it is drawn, s should be clipped to it
+        """
+        def overlaps(surface: pg.Surface, pos: Point) -> bool:  # padded, positions are floats
+            return area is None or area.colliderect(pg.Rect(pos, surface.get_size()).inflate(2, 2))
 
-        for x in self.points:
-            s.blit(x.surface, x.pos)
+        for x in self.ghosts:
+            if overlaps(surface := self.ghost_surface(x), x.pos):
+                s.blit(surface, x.pos)
+
+        if not self.pickups.is_built:
+            self.pickups.build([*self.scatters, *self.points])
+        self.pickups.draw(s, area)
 
         if debug().draw_ghost_path:
             for g in self.ghosts:
@@ -93,18 +168,22 @@ class Board:
         if debug().show_grid:
             s.blit(self.grid(), (0, 0))
 
-        s.blit(self.pacman.surface, self.pacman.pos)
+        if overlaps(surface := self.pacman.surface, self.pacman.pos):
+            s.blit(surface, self.pacman.pos)
+
+    @profiled("board.get_surface")
+    def get_surface(self) -> pg.Surface:
+        s = self.surface.copy().convert_alpha()
+        self.draw(s)
         return s
 
-    def collides_with_list(self, lst: list[SimpleSprite]) -> bool:
-        pops = []
+    def collides_with_list(self, lst: SpatialIndex[SimpleSprite]) -> bool:
         has = False
-        for i, x in enumerate(lst):
+        for x in lst.near(self.pacman.rect.inflate(2, 2)):  # padded, pacman sits on float positions
             if x.collides_with(self.pacman):
-                pops.append(i)
+                lst.remove(x)
+                self.pickups.erase(x)
                 has = True
-        for x in pops[::-1]:
-            lst.pop(x)
         return has
 
     def collides_with_scatter(self) -> bool:
@@ -114,20 +193,38 @@ class Board:
     def collides_with_point(self) -> bool:
         return self.collides_with_list(self.points)
 
+    def flow_field(self) -> FlowField:
+        """the field towards pacman's cell, searched again only once pacman has moved to another cell"""
+        cell = normalize(self.pacman.pos)
+        if self._flow_field is None or self._flow_field.target != cell:
+            self._flow_field = FlowField(self.data.boundary, cell)
+        return self._flow_field
+
+    @profiled("board.update")
     def update(self) -> None:
+        if profiler.enabled:
+            self.record_queue_depth()
         self.pacman.update(self)
         start_chase = False
         start_scatter = False
         if self.collides_with_scatter():
             start_scatter = self.mode == "chase"
             self.mode = "scatter"
-            self.time_since_chase = pg.time.get_ticks()
+            self.time_since_chase = self.clock()
         if self.collides_with_point():
             pass
-        if self.time_since_chase + global_config().scatter_duration < pg.time.get_ticks() and self.mode == "scatter":
+        if self.time_since_chase + global_config().scatter_duration < self.clock() and self.mode == "scatter":
             start_chase = self.mode == "scatter"
             self.mode = "chase"
 
+        if self.swarm is not None:
+            self.swarm.update(self, start_scatter, start_chase)
+        elif self.lod is not None:
+            self.update_scheduled_ghosts(start_scatter or start_chase)
+        else:
+            self.update_ghosts(start_scatter, start_chase)
+
+    def update_ghosts(self, start_scatter: bool, start_chase: bool) -> None:
         for ghost in self.ghosts:
             ghost.update(self)
             collides = ghost.rect.colliderect(self.pacman.rect)
@@ -135,7 +232,7 @@ class Board:
                 ghost.replace()
                 continue
             elif collides:
-                pg.event.post(pg.event.Event(pg.QUIT))
+                self.is_over = True
 
             can_path = ghost.can_pathfind()
             if can_path and self.mode == "scatter" or start_scatter:
@@ -143,6 +240,39 @@ class Board:
             elif can_path or start_chase:
                 ghost.chase_pathfind(self)
 
+    def update_scheduled_ghosts(self, forced: bool) -> None:
+        """update_ghosts with self.lod deciding which ghosts get to ask for a path.  all of them still move"""
+        wants = np.zeros(len(self.ghosts), dtype=bool)
+        skip = np.zeros(len(self.ghosts), dtype=bool)
+        for i, ghost in enumerate(self.ghosts):
+            ghost.update(self)
+            collides = ghost.rect.colliderect(self.pacman.rect)
+            if collides and self.mode == "scatter":
+                ghost.replace()
+                skip[i] = True
+            elif collides:
+                self.is_over = True
+            wants[i] = ghost.can_pathfind()
+
+        xs = np.array([ghost.x for ghost in self.ghosts], dtype=np.float64)
+        ys = np.array([ghost.y for ghost in self.ghosts], dtype=np.float64)
+        remaining = np.array([len(ghost.moves) for ghost in self.ghosts])
+        chosen = self.lod.select(self, xs, ys, wants, remaining, forced, skip)
+        if self.mode == "scatter":
+            self.lod.dispatch(chosen, lambda i: self.ghosts[i].scatter_pathfind(self), self.data.boundary)
+        else:
+            self.lod.dispatch(chosen, lambda i: self.ghosts[i].chase_pathfind(self), self.data.boundary)
+
+    def record_queue_depth(self) -> None:
+        """how many ghosts are waiting on a path, and how many requests a PathService hasn't started yet"""
+        profiler.record("pathfind.waiting", sum(ghost.thread is not None for ghost in self.ghosts))
+        if isinstance(self.pool, PathService):
+            profiler.record("pathfind.pending", self.pool.pending)
+
+    def close(self) -> None:
+        if isinstance(self.pool, PathService):
+            self.pool.close()
+
     def on_event(self, event: pg.event.Event) -> None:
         if event.type != pg.KEYDOWN:
             return
@@ -0,0 +1,20 @@
+from __future__ import annotations
+
+from typing import TypeAlias, Callable
+
+__all__ = ("Clock", "TickClock")
+
+Clock: TypeAlias = Callable[[], int]  # milliseconds, like pg.time.get_ticks
+
+
+class TickClock:
+    """a simulation clock, time only moves when tick is called"""
+    def __init__(self, tick_ms: float = 1000 / 60):
+        self.tick_ms = tick_ms
+        self.ticks = 0
+
+    def __call__(self) -> int:
+        return int(self.ticks * self.tick_ms)
+
+    def tick(self) -> None:
+        self.ticks += 1
@@ -0,0 +1,118 @@
+"""
+a compiled board is everything BoardData.from_surface derives from the information image, stored as packed arrays:
+
+    MAGIC | header length (u32) | json header | arrays, each aligned to _ALIGN bytes
+
+the header holds the key the board was compiled for, the mask size and the dtype, shape and offset of every array.
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+
+from src.models.assets import fetch_surface, asset_file, asset_digest, mask_from_array, array_from_mask
+from src.models.config import *
+from src.models.pathfind import Grid
+
+__all__ = ("compiled_board_data", "board_key", "compiled_path", "read_compiled", "write_compiled")
+
+MAGIC = b"PACBOARD\x01"
+_ALIGN = 16
+_POINT_FIELDS = ("ghost_spawn_locations", "pacman_spawn_locations", "scatter_points", "points_points")
+
+
+def board_key(information_path: str) -> str:
+    c = global_config()
+    b = c.board
+    return asset_digest(information_path, b.wall_color, b.pacman_wall_color, b.pacman_spawn_color,
+                        b.ghost_spawn_color, b.scatter_color, c.grid_size, asset_digest(b.point_path))
+
+
+def compiled_path(information_path: str) -> Path:
+    return asset_file(information_path).with_suffix(".board")
+
+
+def write_compiled(path: Path, key: str, data: BoardData) -> None:
+    arrays: dict[str, np.ndarray] = {
+        name: np.array(getattr(data, name), dtype=np.int32).reshape(-1, 2) for name in _POINT_FIELDS
+    }
+    size = data.pacman_mask.get_size()
+    arrays["pacman_mask"] = np.packbits(array_from_mask(data.pacman_mask))
+    arrays["ghost_mask"] = np.packbits(array_from_mask(data.ghost_mask))
+    arrays["vertices"], arrays["neighbors"] = data.boundary.to_arrays()
+
+    layout = {}
+    offset = 0
+    for name, array in arrays.items():
+        layout[name] = (array.dtype.str, array.shape, offset)
+        offset += -(-array.nbytes // _ALIGN) * _ALIGN
+    header = json.dumps({"key": key, "size": size, "grid_size": data.boundary.grid_size, "arrays": layout}).encode()
+    start = -(-(len(MAGIC) + 4 + len(header)) // _ALIGN) * _ALIGN
+
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        f.write(MAGIC + struct.pack("<I", len(header)) + header)
+        for name, array in arrays.items():
+            f.seek(start + layout[name][-1])
+            f.write(array.tobytes())
+        f.truncate(start + offset)
+    os.replace(tmp, path)
+
+
+def read_compiled(path: Path, key: str) -> Optional[BoardData]:
+    """:return: None if there is no compiled board at path, it's damaged or it was compiled for another key"""
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # missing or empty
+        return None
+    with buffer:
+        try:
+            return _parse(buffer, key)
+        except (struct.error, ValueError, KeyError, TypeError, IndexError):  # bad json is a ValueError too
+            return None  # compiled again like a stale one
+
+
+def _parse(buffer: mmap.mmap, key: str) -> Optional[BoardData]:
+    """the board in buffer.  every array is copied out of it, so nothing points into the map once it's closed"""
+    if buffer[:len(MAGIC)] != MAGIC:
+        return None
+    length, = struct.unpack_from("<I", buffer, len(MAGIC))
+    header = json.loads(buffer[len(MAGIC) + 4:len(MAGIC) + 4 + length])
+    if header["key"] != key:
+        return None
+    start = -(-(len(MAGIC) + 4 + length) // _ALIGN) * _ALIGN
+
+    def array(name: str) -> np.ndarray:
+        dtype, shape, offset = header["arrays"][name]
+        count = int(np.prod(shape))
+        return np.frombuffer(buffer, dtype=dtype, count=count, offset=start + offset).reshape(shape).copy()
+
+    w, h = header["size"]
+    points = {name: list(map(tuple, array(name).tolist())) for name in _POINT_FIELDS}
+    return BoardData(
+        pacman_mask=mask_from_array(np.unpackbits(array("pacman_mask"), count=w * h).reshape(w, h).astype(bool)),
+        ghost_mask=mask_from_array(np.unpackbits(array("ghost_mask"), count=w * h).reshape(w, h).astype(bool)),
+        boundary=Grid.from_arrays(array("vertices"), array("neighbors"), header["grid_size"]),
+        **points
+    )
+
+
+def compiled_board_data(information_path: str) -> BoardData:
+    """loads the board from its compiled artifact, compiling it first if it is missing or stale"""
+    key = board_key(information_path)
+    path = compiled_path(information_path)
+    if (data := read_compiled(path, key)) is not None:
+        return data
+    data = BoardData.from_surface(fetch_surface(information_path))
+    try:
+        write_compiled(path, key, data)
+    except OSError:
+        pass  # a read only asset directory only costs the cache
+    return data
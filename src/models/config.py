@@ -3,11 +3,13 @@ from __future__ import annotations
 from dataclasses import dataclass
 from typing import TypeAlias, Optional, Literal, TYPE_CHECKING
 
+import numpy as np
 import pygame as pg
 
 
-from src.models.assets import fetch_surface, __path__
-from src.models.pathfind import Grid
+from src.models.assets import fetch_surface, mask_from_array, asset_names
+from src.models.pathfind import Grid, boundary_matrix
+from src.models.profiling import profiled
 
 if TYPE_CHECKING:
     from src.models.goals import *
@@ -35,78 +37,79 @@ class BoardData:
     boundary: Grid
 
     @classmethod
+    @profiled("board_data.from_surface")
     def from_surface(cls, surface: pg.Surface) -> BoardData:
         grid_size = global_config().grid_size
-        grid: list[list[Color]] = [[(-1, -1, -1)] * (surface.get_width() // grid_size)
-                                   ] * (surface.get_height() // grid_size)  # setup [y][x]
-
-        boundary = [[1 for _ in range(surface.get_width())] for __ in range(surface.get_height())]
-        points = []
-
         board = global_config().board
-        pacman_mask = pg.Surface(surface.get_size(), flags=pg.SRCALPHA)
-        ghost_mask = pg.Surface(surface.get_size(), flags=pg.SRCALPHA)
-        pacman_mask.fill((0, 0, 0, 0))
-        ghost_mask.fill((0, 0, 0, 0))
+        width, height = surface.get_size()
+
+        pixels = _packed_colors(pg.surfarray.array3d(surface))  # [x][y]
+        transparent = (pixels == 0) & (pg.surfarray.array_alpha(surface) == 0)
 
         _color_map: dict[Color, list[Point]] = {
             board.pacman_spawn_color: [],
             board.ghost_spawn_color: [],
             board.scatter_color: []
         }
-
-        for x in range(surface.get_width()):
-            for y in range(surface.get_height()):
-                color = tuple(surface.get_at((x, y)))[:3]
-                # is an increment of grid_size:
-                if y % grid_size == 0 == x % grid_size:
-                    grid[y // grid_size][x // grid_size] = color
-                if not (y % grid_size == 0 or x % grid_size == 0):
-                    boundary[y][x] = -1
-
-                if color in _color_map.keys():
-                    _color_map[color].append((x, y))
-                elif color == board.wall_color:
-                    pacman_mask.set_at((x, y), color)
-                    ghost_mask.set_at((x, y), color)
-                    boundary[y][x] = False
-                elif color == board.pacman_wall_color:
-                    pacman_mask.set_at((x, y), color)
-                elif color == (200, 0, 0, 255):
-                    boundary[y][x] = False
-
-        pac_mask = pg.mask.from_surface(pacman_mask, 1)
-        ghost_mask = pg.mask.from_surface(ghost_mask, 1)
-
-        for y in range(len(grid)):
-            for x in range(len(grid[0])):
-                realx, realy = x * grid_size, y * grid_size
-                surf = fetch_surface(global_config().board.point_path)
-                w, h = surf.get_size()
-                w -= 1
-                h -= 1
-                if all(realx+w < surface.get_width() and
-                       realy+h < surface.get_height() and surface.get_at((posx, posy)) == (0, 0, 0, 0)
-                       for posx, posy in (
-                        (realx, realy),
-                        (realx+w, realy),
-                        (realx+w, realy+h),
-                        (realx, realy+h)
-                )):
-                    points.append((realx, realy))
-                    pg.draw.rect(surface, (1, 1, 1, 1), (realx, realy, w, h))
+        special = np.zeros(pixels.shape, dtype=bool)
+        for color, locations in _color_map.items():
+            found = pixels == _packed_color(color)
+            special |= found
+            locations.extend(zip(*(a.tolist() for a in np.nonzero(found))))  # ordered by x then y
+
+        # the get_at parser also had a (200, 0, 0, 255) branch, but it compared against rgb only and never matched
+        walls = (pixels == _packed_color(board.wall_color)) & ~special
+        pacman_walls = (pixels == _packed_color(board.pacman_wall_color)) & ~special & ~walls
+
+        w, h = fetch_surface(board.point_path).get_size()
+        w -= 1
+        h -= 1
+        xs = np.arange(0, width - width % grid_size, grid_size)
+        ys = np.arange(0, height - height % grid_size, grid_size)
+        xs, ys = xs[xs + w < width], ys[ys + h < height]
+        fits = (transparent[np.ix_(xs, ys)] & transparent[np.ix_(xs + w, ys)] &
+                transparent[np.ix_(xs + w, ys + h)] & transparent[np.ix_(xs, ys + h)])
+
+        # a point covers the pixels of its sprite, so a later cell with a corner under an earlier point is skipped
+        points: list[Point] = []
+        taken: set[Point] = set()
+
+        def covered(px: int, py: int) -> bool:
+            return any((ax, ay) in taken for ax in range(px - px % grid_size, px - w, -grid_size)
+                       for ay in range(py - py % grid_size, py - h, -grid_size))
+
+        for iy, ix in np.argwhere(fits.T).tolist():  # row by row
+            realx, realy = int(xs[ix]), int(ys[iy])
+            if not any(covered(posx, posy) for posx, posy in (
+                    (realx, realy),
+                    (realx+w, realy),
+                    (realx+w, realy+h),
+                    (realx, realy+h)
+            )):
+                points.append((realx, realy))
+                taken.add((realx, realy))
 
         return cls(
             ghost_spawn_locations=_color_map[board.ghost_spawn_color],
             pacman_spawn_locations=_color_map[board.pacman_spawn_color],
-            pacman_mask=pac_mask,
-            ghost_mask=ghost_mask,
-            boundary=Grid(boundary, grid_size),
+            pacman_mask=mask_from_array(walls | pacman_walls),
+            ghost_mask=mask_from_array(walls),
+            boundary=Grid(boundary_matrix(walls, grid_size), grid_size),
             points_points=points,
             scatter_points=_color_map[board.scatter_color],
         )
 
 
+def _packed_color(color: Color) -> int:
+    r, g, b = color[:3]
+    return r << 16 | g << 8 | b
+
+
+def _packed_colors(rgb: np.ndarray) -> np.ndarray:
+    rgb = rgb.astype(np.int32)
+    return rgb[..., 0] << 16 | rgb[..., 1] << 8 | rgb[..., 2]
+
+
 @dataclass(slots=True)
 class Goals:
     scatter: list[GoalFunc]
@@ -129,13 +132,21 @@ class BoardConfig:
     ghost_root: str = "ghosts"
 
     def ghosts(self) -> list[str]:
-        return list(str(x) for x in (__path__ / self.ghost_root).glob("*"))
+        return asset_names(self.ghost_root)
+
+    def sprites(self) -> list[str]:
+        """everything drawn for an entity or a pickup"""
+        return [self.pacman_path, self.pacman_open_path, self.scatter_path, self.point_path, *self.ghosts()]
 
 
 @dataclass(slots=True)
 class Debug:
     draw_ghost_path: bool = False
     show_grid: bool = False
+    profile: bool = False  # timings of the hot paths, shown over the game
+    profile_export: Optional[str] = None  # where the timings are written on exit, .json or .csv
+    record: Optional[str] = None  # where a log of the game is written for src.replay
+    path_delay_ticks: int = 3  # while recording, paths arrive this many updates after they were asked for
 
 
 @dataclass(slots=True)
@@ -152,6 +163,24 @@ class Config:
     pool_processes: int
     incr_pacman_speed: int = 30
     scatter_duration: int = 60*20*10  # 10 seconds
+    precompute_paths: bool = False  # all pairs path tables, cached next to the information asset
+    shared_flow_field: bool = False  # ghosts heading for pacman read their path from one search per pacman cell
+    path_cache_size: int = 0  # paths remembered by Grid.get_path, 0 turns the cache off
+    process_pathfinding: bool = False  # search in pool_processes worker processes instead of threads
+    path_cluster_size: int = 0  # grid cells along a side of a hierarchical pathfinding cluster, 0 searches every vertex
+    path_refine_segments: int = 0  # abstract edges of a hierarchical path expanded per search, 0 expands the whole path
+    contract_corridors: bool = False  # search between junctions, dead ends and turns instead of every vertex
+    tick_rate: int = 60  # board updates a second, speeds are pixels per update
+    render_rate: int = 0  # frames drawn a second at most, 0 draws whenever the board was updated
+    max_catch_up_ticks: int = 5  # updates run in one go after a slow frame, time beyond that is dropped
+    batched_ghosts: bool = False  # ghosts live in numpy arrays and move together, see swarm.py
+    ghost_count: int = 0  # with batched_ghosts, sprites goals and spawns are repeated up to this.  0 is one per sprite
+    path_batch_size: int = 0  # with batched_ghosts, this many asking for one cell in a tick share a flow field, 0 never
+    lod_distances: tuple[int, ...] = ()  # steps to pacman where each pathfinding tier past the first begins, see lod.py
+    lod_repath_every: tuple[int, ...] = (1, 15, 60)  # ticks between a ghost's chances to ask for a path, per tier
+    lod_offscreen_tiers: int = 1  # tiers a ghost off the display drops
+    max_path_requests: int = 0  # searches the ghosts ask for in one tick, 0 is no limit
+    path_budget: int = 0  # ghosts stop asking for paths once a tick searched this many vertices, 0 is no limit
     debug: Debug = Debug()
 
     @property
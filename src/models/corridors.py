@@ -0,0 +1,198 @@
+"""
+a Grid with its corridors contracted.  a corridor cell has a neighbour straight ahead and one behind, and at most one
+more beside it in a lane that runs the same way, so straight runs of them are corridors one or two lanes wide (the
+shipped board's are two).  a corridor makes no routing decision, so each one is folded into weighted edges between the
+junctions, dead ends and turns around it that remember the cells they go through.  searches run over those nodes and
+expand the edges back into cells, a start or goal inside a corridor is joined to its ends with a search of just that
+corridor.  edges into points that aren't vertices (the step pixel was open but the point is a wall) lead nowhere, so
+they don't stop a point from being a corridor and are only looked at when they are the goal
+"""
+from __future__ import annotations
+
+import heapq
+import math
+from typing import TYPE_CHECKING, Optional
+
+if TYPE_CHECKING:
+    from src.models.config import *
+    from src.models.pathfind import Grid
+
+__all__ = ("CorridorGraph",)
+
+_Edge = tuple["Point", int, tuple["Point", ...]]  # to, steps, the cells between
+
+
+class CorridorGraph:
+    def __init__(self, grid: Grid):
+        self.grid = grid
+        vertices = grid._vertices  # NOQA
+        step = grid.grid_size
+
+        def onward(point: Point) -> list[Point]:
+            return [p for p in vertices[point].valid_vertices if p in vertices]
+
+        def axis(point: Point) -> Optional[int]:
+            """0 for a lane running along x, 1 along y, None when point isn't one"""
+            out = onward(point)
+            x, y = point
+            for i, (ahead, behind) in enumerate((((x + step, y), (x - step, y)), ((x, y + step), (x, y - step)))):
+                if ahead in out and behind in out and len(out) <= 3:
+                    return i
+            return None
+
+        axes = {point: a for point in vertices if (a := axis(point)) is not None}
+
+        def beside(point: Point) -> list[Point]:
+            x, y = point
+            return [p for p in onward(point) if (p[0] == x, p[1] == y)[axes[point]]]
+
+        # a lane's neighbour has to be a lane running the same way, or the point is where a corridor opens up
+        corridor = {p for p in axes if all(axes.get(q) == axes[p] for q in beside(p))}
+        self._component: dict[Point, int] = {}
+        self._cells: list[set[Point]] = []
+        for point in corridor:
+            if point in self._component:
+                continue
+            cells = {point}
+            frontier = [point]
+            while frontier:
+                frontier = [q for p in frontier for q in onward(p) if q in corridor and q not in cells]
+                cells.update(frontier)
+            for cell in cells:
+                self._component[cell] = len(self._cells)
+            self._cells.append(cells)
+        self._onward = onward
+
+        self.edges: dict[Point, list[_Edge]] = {}
+        for point, vertex in vertices.items():
+            if point not in self._component:
+                self.edges[point] = [(p, 1, ()) for p in vertex.valid_vertices if p not in self._component]
+        for component, cells in enumerate(self._cells):
+            ends = self._ends(component)
+            for end in ends:
+                distance, parent = self._spread(component, [q for q in onward(end) if q in cells])
+                for other in ends:
+                    if other != end and (edge := self._leave(component, distance, parent, other, True)):
+                        self.edges[end].append((other, edge[1] + 1, edge[2]))  # and the step in from end
+
+    @property
+    def node_count(self) -> int:
+        return len(self.edges)
+
+    def _ends(self, component: int) -> set[Point]:
+        """the nodes a corridor opens onto"""
+        cells = self._cells[component]
+        return {q for p in cells for q in self._onward(p) if q not in cells}
+
+    def _spread(self, component: int, sources: list[Point]) -> tuple[dict[Point, int], dict[Point, Point]]:
+        """a breadth first search through one corridor, each cell's parent is a step towards the nearest source"""
+        cells = self._cells[component]
+        distance = {p: 0 for p in sources}
+        parent: dict[Point, Point] = {}
+        frontier = list(sources)
+        while frontier:
+            following = []
+            for p in frontier:
+                for q in self._onward(p):
+                    if q in cells and q not in distance:
+                        distance[q] = distance[p] + 1
+                        parent[q] = p
+                        following.append(q)
+            frontier = following
+        return distance, parent
+
+    def _leave(self, component: int, distance: dict[Point, int], parent: dict[Point, Point], node: Point,
+               outward: bool) -> Optional[_Edge]:
+        """
+        the shortest way between the sources of a _spread and node, an end of the corridor
+
+        :param outward: from the source out to node, otherwise from node in to the source
+        """
+        cells = self._cells[component]
+        entries = [q for q in self._onward(node) if q in distance and q in cells]
+        if not entries:
+            return None
+        q = min(entries, key=distance.__getitem__)
+        way = [q]
+        while way[-1] in parent:
+            way.append(parent[way[-1]])
+        if outward:
+            return node, distance[q] + 1, tuple(way[::-1])
+        return node, distance[q] + 1, tuple(way)
+
+    def _sources(self, goal: Point) -> list[tuple[int, list[Point], int]]:
+        """(corridor, cells, steps past them) for the corridors a goal is in, or is stepped into from"""
+        if goal in self._component:
+            return [(self._component[goal], [goal], 0)]
+        if goal in self.grid._vertices:  # NOQA
+            return []
+        anchors: dict[int, list[Point]] = {}
+        for p in self.grid.reverse_neighbors.get(goal, ()):
+            if p in self._component:
+                anchors.setdefault(self._component[p], []).append(p)
+        return [(component, cells, 1) for component, cells in anchors.items()]
+
+    def get_path(self, start: Point, goal: Point) -> list[Point]:
+        """a shortest path, like Grid.get_path.  points are normalized"""
+        if start == goal:
+            return [start]
+        sources = self._sources(goal)
+        arriving: dict[Point, list[_Edge]] = {}  # into goal from the ends of its corridors
+        for component, cells, past in sources:
+            distance, parent = self._spread(component, cells)
+            for end in self._ends(component):
+                if edge := self._leave(component, distance, parent, end, False):
+                    _, steps, way = edge
+                    if past:
+                        arriving.setdefault(end, []).append((goal, steps + 1, way))
+                    else:
+                        arriving.setdefault(end, []).append((goal, steps, way[:-1]))
+        leaving: list[_Edge] = self.edges.get(start, [])
+        if start in self._component:
+            component = self._component[start]
+            distance, parent = self._spread(component, [start])
+            leaving = [edge for end in self._ends(component)
+                       if (edge := self._leave(component, distance, parent, end, True))]
+            leaving = [(node, steps, way[1:]) for node, steps, way in leaving]
+            for _, cells, past in (source for source in sources if source[0] == component):
+                nearest = min(cells, key=lambda p: distance.get(p, math.inf))
+                if nearest in distance:  # along start's own corridor
+                    way = [nearest]
+                    while way[-1] in parent:
+                        way.append(parent[way[-1]])
+                    way = way[::-1][1:]
+                    leaving.append((goal, distance[nearest] + past, tuple(way if past else way[:-1])))
+        step = self.grid.grid_size
+        gx, gy = goal
+
+        # ties go to the node furthest along, which keeps the search from filling the open rooms
+        heap: list[tuple[float, int, Point]] = [((abs(gx - start[0]) + abs(gy - start[1])) / step, 0, start)]
+        came_from: dict[Point, tuple[Point, tuple[Point, ...]]] = {}
+        g_score = {start: 0}
+        closed: set[Point] = set()
+        while heap:
+            _, g, current = heapq.heappop(heap)
+            g = -g
+            if current in closed:
+                continue
+            if current == goal:
+                self.grid.searched += len(closed)
+                path = [current]
+                while current != start:
+                    current, cells = came_from[current]
+                    path.extend(cells[::-1])
+                    path.append(current)
+                return path[::-1]
+            closed.add(current)
+
+            edges = leaving if current == start else self.edges.get(current, [])
+            if current in arriving:
+                edges = edges + arriving[current]
+            for neighbor, cost, cells in edges:
+                if neighbor not in closed and g + cost < g_score.get(neighbor, math.inf):
+                    came_from[neighbor] = current, cells
+                    g_score[neighbor] = g + cost
+                    h = (abs(gx - neighbor[0]) + abs(gy - neighbor[1])) / step
+                    heapq.heappush(heap, (g + cost + h, -g - cost, neighbor))
+        self.grid.searched += len(closed)
+        return []
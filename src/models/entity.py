@@ -1,6 +1,7 @@
 from __future__ import annotations
 import functools
 import random
+import time
 from multiprocessing.pool import ThreadPool, ApplyResult
 from typing import TYPE_CHECKING, Optional
 
@@ -9,8 +10,10 @@ import pygame as pg
 if TYPE_CHECKING:
     from src.models.board import Board
 
-from src.models.pathfind import Grid
-from src.models.assets import fetch_surface
+from src.models.pathfind import Grid, normalize
+from src.models.pathservice import PathService, PathRequest
+from src.models.profiling import profiled
+from src.models.assets import fetch_surface, sprite_frames, Frame
 from src.models.config import *
 from src.models.goals import *
 
@@ -28,6 +31,7 @@ class SimpleSprite:
         self.x, self.y = pos
         self.surface = fetch_surface(path)
         self.mask = mask_from_path(path)
+        self.rect = pg.Rect(pos, self.surface.get_size())
 
     @classmethod
     def scatter_at(cls, x_y: Point) -> SimpleSprite:
@@ -67,7 +71,7 @@ class Entity:
         self._add_direction = add_direction
         self._is_ghost = is_ghost
         self.direction: Direction = "none"
-        self.mask = pg.mask.from_surface(self.surface, 1)
+        self.mask = self.frame.mask
         self.has_moved = False
         self.queued_direction: Direction = "none"
         self.stopped_since = -1
@@ -77,8 +81,20 @@ class Entity:
         return pg.Rect(self.x, self.y, self.surface.get_width(), self.surface.get_height())
 
     @property
-    def surface(self):
-        return fetch_surface(self._surface_path)
+    def frame(self) -> Frame:
+        return self.rotated(0)
+
+    def rotated(self, angle: int) -> Frame:
+        return sprite_frames(self._surface_path)[angle]
+
+    @property
+    def surface(self) -> pg.Surface:
+        return self.frame.surface
+
+    @property
+    def collision_mask(self) -> pg.mask.Mask:
+        """what has to fit between the walls, the unrotated frame's unless the sprite turns with its direction"""
+        return self.mask
 
     @property
     def pos(self) -> Point:
@@ -105,26 +121,31 @@ class Entity:
     def on_event(self, event: pg.event.Event) -> None:
         pass
 
-    def advance_if_able(self, board: Board, *, recur: int = 4) -> bool:
+    def advance_if_able(self, board: Board) -> bool:
         """
+        takes a full step if there is room for one, otherwise goes as many whole pixels of it as there is room for
 
-        :param board:
-        :param recur:
-        :return: true if advancement made
+        :return: true if the full step was taken
         """
-        self.advance()
-        r = self.mask.get_rect()
-        r.x, r.y = 0, 0
-        if collision := board.collides_with_wall(self.mask, (round(self.pos[0]), round(self.pos[1])),
-                                                 is_ghost=self._is_ghost):
-            self.advance(reverse=True)
-            if recur:
-                speed = self.speed
-                self.change_speed(1)
-                self.advance_if_able(board, recur=recur - 1)
-                self.change_speed(speed)
-
-        return not collision
+        walkable = board.walkable(self.collision_mask, self._is_ghost)
+        width, height = walkable.shape
+
+        def fits(x: float, y: float) -> bool:
+            x, y = round(x), round(y)
+            return 0 <= x < width and 0 <= y < height and walkable[x, y]
+
+        dx, dy = self._add_direction
+        if fits(self.x + dx, self.y + dy):
+            self.x += dx
+            self.y += dy
+            return True
+        dx, dy = _DIR_MAP[self.direction]
+        pixels = 0
+        while pixels + 1 < self.speed and fits(self.x + dx * (pixels + 1), self.y + dy * (pixels + 1)):
+            pixels += 1
+        self.x += dx * pixels
+        self.y += dy * pixels
+        return False
 
     def change(self, direction: Direction) -> None:
         self.queued_direction = direction
@@ -147,7 +168,7 @@ class Entity:
         if self.has_moved:
             self.stopped_since = -1
         elif self.stopped_since == -1:
-            self.stopped_since = pg.time.get_ticks()
+            self.stopped_since = board.clock()
 
 
 def path_find(path: Grid, start: Point, end: Point) -> list[Point]:
@@ -170,10 +191,36 @@ def get_pool() -> ThreadPool:
     return get_pool.__pool__
 
 
+class ImmediateResult:
+    def __init__(self, value):
+        self.value = value
+
+    def ready(self) -> bool:
+        return True
+
+    def get(self):
+        return self.value
+
+
+class ImmediatePool:
+    """a stand in for get_pool() that runs work on the calling thread, so results are ready on the tick they were asked
+    for"""
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.
+
+    def apply_async(self, func, args=()) -> ImmediateResult:
+        start = time.perf_counter()
+        result = ImmediateResult(func(*args))
+        self.calls += 1
+        self.seconds += time.perf_counter() - start
+        return result
+
+
 class AIEntity(Entity):
     def __init__(self, chase_goals: list[GoalFunc], scatter_goals: list[GoalFunc], *args, **kwargs):
         super().__init__(*args, is_ghost=True, **kwargs)
-        self.thread: Optional[ApplyResult] = None
+        self.thread: Optional[ApplyResult | ImmediateResult | PathRequest] = None
         self.moves: list[Point] = []
         self._current_destination: Optional[Point] = None
         self.chase_goals = chase_goals
@@ -181,7 +228,13 @@ class AIEntity(Entity):
         self._aggression_length = 0
 
     def path_find_to(self, board: Board, point: Point) -> None:
-        self.thread = get_pool().apply_async(path_find, (board.data.boundary, self.pos, point))
+        if global_config().shared_flow_field and normalize(point) == normalize(board.pacman.pos):
+            self.thread = ImmediateResult(board.flow_field().path(self.pos))
+        elif isinstance(board.pool, PathService):
+            # a ghost with fewer moves left needs its path sooner, asking again supersedes what it asked before
+            self.thread = board.pool.request(self, self.pos, point, priority=len(self.moves))
+        else:
+            self.thread = board.pool.apply_async(path_find, (board.data.boundary, self.pos, point))
         self.change("none")
         self.moves = []
 
@@ -218,6 +271,7 @@ class AIEntity(Entity):
             self._current_destination = self.moves.pop(0)
             self.move_to(self._current_destination)
 
+    @profiled("ghost.update")
     def update(self, board: Board) -> None:
         last_pos = self.pos
         super().update(board)
@@ -247,9 +301,10 @@ class Ghost(AIEntity):
     @classmethod
     def ghosts_from_data(cls, data: BoardData) -> list[Ghost]:
         c = global_config()
-        random.shuffle(data.ghost_spawn_locations)
+        spawns = data.ghost_spawn_locations.copy()  # data can be shared between boards
+        random.shuffle(spawns)
         return [Ghost(goals.chase, goals.scatter, spawn, ghost_path) for ghost_path, goals, spawn
-                in zip(c.board.ghosts(), c.ghost_goals, data.ghost_spawn_locations)]
+                in zip(c.board.ghosts(), c.ghost_goals, spawns)]
 
     def replace(self) -> None:
         self.pos = self.start_pos
@@ -260,16 +315,22 @@ class PacMan(Entity):
         c = global_config()
         self.inc = 0
         super().__init__(spawn_location[0], spawn_location[1], c.pacman_speed, c.board.pacman_path)
+        sprite_frames(c.board.pacman_open_path)  # both animation frames are ready before the first tick
 
     @property
-    def surface(self):
+    def frame(self) -> Frame:
         incr_every = global_config().incr_pacman_speed
         if self.inc % incr_every < incr_every / 2:
-            return fetch_surface(global_config().board.pacman_path)
+            return sprite_frames(global_config().board.pacman_path)[0]
+        return sprite_frames(global_config().board.pacman_open_path)[_ROT_MAP[self.direction]]
 
-        s = fetch_surface(global_config().board.pacman_open_path)
-        return pg.transform.rotate(s, _ROT_MAP[self.direction])
+    @property
+    def collision_mask(self) -> pg.mask.Mask:
+        # the closed sprite turned the way pacman faces.  the animation frame's mask would change every few ticks, and
+        # a smaller open mouth could slip into a spot the closed frame then can't move out of
+        return self.rotated(_ROT_MAP[self.direction]).mask
 
+    @profiled("pacman.update")
     def update(self, board: Board) -> None:
         super().update(board)
         if self.has_moved:
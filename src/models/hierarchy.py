@@ -0,0 +1,149 @@
+"""
+hierarchical pathfinding (HPA*) over a Grid.  the board is cut into square clusters and every point with an edge into
+another cluster is an entrance.  the abstract graph joins the entrances of a cluster by their shortest distance inside
+it and entrances of neighbouring clusters by their crossing edge, so a search only looks at entrances plus the clusters
+the start and goal are in.  every path between entrances decomposes into those two kinds of edges, so the paths found
+are as short as a flat search's
+"""
+from __future__ import annotations
+
+import heapq
+import math
+from typing import Optional, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from src.models.config import *
+    from src.models.pathfind import Grid
+
+__all__ = ("Hierarchy",)
+
+_Parents = dict["Point", "Point"]
+
+
+class Hierarchy:
+    def __init__(self, grid: Grid, cluster: int, refine: int = 0):
+        """
+        :param cluster: grid cells along the side of a cluster
+        :param refine: how many abstract edges of a path are expanded into cells, 0 expands all of them.  the path then
+        ends part way and is searched again from there once walked
+        """
+        self.grid = grid
+        self.cluster = cluster
+        self.span = cluster * grid.grid_size
+        self.refine = refine
+        self._edges: dict[Point, list[tuple[Point, int]]] = {}  # entrance -> (entrance, steps)
+        self._segments: dict[tuple[Point, Point], list[Point]] = {}  # paths inside a cluster, filled in when walked
+
+        entrances: dict[tuple[int, int], set[Point]] = {}
+        for point, vertex in grid._vertices.items():  # NOQA
+            for neighbor in vertex.valid_vertices:
+                if self._cluster(point) != self._cluster(neighbor):
+                    entrances.setdefault(self._cluster(point), set()).add(point)
+                    entrances.setdefault(self._cluster(neighbor), set()).add(neighbor)
+                    self._edges.setdefault(point, []).append((neighbor, 1))
+        for cluster_entrances in entrances.values():
+            for entrance in cluster_entrances:
+                _, steps = self._search(entrance)
+                self._edges.setdefault(entrance, []).extend(
+                    (other, steps[other]) for other in cluster_entrances if other != entrance and other in steps)
+
+    def _cluster(self, point: Point) -> tuple[int, int]:
+        return int(point[0] // self.span), int(point[1] // self.span)
+
+    def _search(self, source: Point, reverse: bool = False) -> tuple[_Parents, dict[Point, int]]:
+        """
+        breadth first inside source's cluster
+
+        :param reverse: follow edges backwards, the parents are then each point's next step towards source
+        """
+        cluster = self._cluster(source)
+        vertices = self.grid._vertices  # NOQA
+        reverse_neighbors = self.grid.reverse_neighbors if reverse else None
+        parents = {source: source}
+        steps = {source: 0}
+        frontier = [source]
+        while frontier:
+            following = []
+            for point in frontier:
+                if reverse:
+                    neighbors = reverse_neighbors.get(point, ())
+                else:
+                    neighbors = vertex.valid_vertices if (vertex := vertices.get(point)) is not None else ()
+                for neighbor in neighbors:
+                    if neighbor not in parents and self._cluster(neighbor) == cluster:
+                        parents[neighbor] = point
+                        steps[neighbor] = steps[point] + 1
+                        following.append(neighbor)
+            frontier = following
+        return parents, steps
+
+    @staticmethod
+    def _walk_back(parents: _Parents, source: Point, point: Point) -> list[Point]:
+        """:return: source to point, following parents from point"""
+        path = [point]
+        while point != source:
+            point = parents[point]
+            path.append(point)
+        return path[::-1]
+
+    def _segment(self, a: Point, b: Point) -> list[Point]:
+        if (a, b) not in self._segments:
+            parents, _ = self._search(a)
+            self._segments[(a, b)] = self._walk_back(parents, a, b)
+        return self._segments[(a, b)]
+
+    def get_path(self, start: Point, goal: Point) -> list[Point]:
+        """a shortest path, like Grid.get_path, cut short after `refine` abstract edges.  points are normalized"""
+        forward, from_start = self._search(start)
+        backward, to_goal = self._search(goal, reverse=True)
+        step = self.grid.grid_size
+
+        def edges(point: Point) -> list[tuple[Point, int]]:
+            found = list(self._edges.get(point, ()))
+            if point == start:
+                found.extend((p, n) for p, n in from_start.items() if p in self._edges or p == goal)
+            if point in to_goal:
+                found.append((goal, to_goal[point]))
+            return found
+
+        def heuristic(point: Point) -> float:
+            return (abs(goal[0] - point[0]) + abs(goal[1] - point[1])) / step
+
+        heap: list[tuple[float, int, Point]] = [(heuristic(start), 0, start)]
+        came_from: dict[Point, Point] = {}
+        g_score = {start: 0}
+        closed: set[Point] = set()
+        abstract: Optional[list[Point]] = None
+        while heap:
+            _, g, current = heapq.heappop(heap)
+            if current in closed:
+                continue
+            if current == goal:
+                abstract = [current]
+                while current != start:
+                    current = came_from[current]
+                    abstract.append(current)
+                abstract.reverse()
+                break
+            closed.add(current)
+            for neighbor, cost in edges(current):
+                if neighbor not in closed and g + cost < g_score.get(neighbor, math.inf):
+                    came_from[neighbor] = current
+                    g_score[neighbor] = g + cost
+                    heapq.heappush(heap, (g + cost + heuristic(neighbor), g + cost, neighbor))
+        self.grid.searched += len(forward) + len(backward) + len(closed)
+        if abstract is None:
+            return []
+
+        pairs = list(zip(abstract, abstract[1:]))
+        path = [start]
+        for a, b in pairs[:self.refine] if self.refine else pairs:
+            if self._cluster(a) != self._cluster(b):
+                path.append(b)  # a crossing edge, one step
+            elif a == start and b in forward:
+                path.extend(self._walk_back(forward, start, b)[1:])
+            elif b == goal and a in backward:
+                path.extend(self._walk_back(backward, goal, a)[-2::-1])
+            else:
+                path.extend(self._segment(a, b)[1:])
+        return path
@@ -0,0 +1,155 @@
+"""
+levels of detail for the ghosts' pathfinding.  each tick every ghost is put in a tier by how many steps it is from
+pacman, a tier further out when it's off the display.  ghosts in the first tier may ask for a path whenever they need
+one, further out they only get the chance every so many ticks and otherwise keep walking what they have.  on top of
+that no more than a fixed number of searches are asked for in one tick, and searching stops once a tick has visited its
+budget of vertices.  the budget counts vertices rather than time so a tick asks for the same searches on any machine,
+and a recording replays the way it was played.  the closest ghosts and those with the fewest moves left go first, the
+rest ask again the next tick
+
+the budget is checked between searches, so a tick can run over it by one search.  one A* towards the shipped goals
+visits about 3500 vertices, 15 to 20 ms here, so with them no budget keeps a tick inside a 16 ms frame: the tick is the
+budget plus one search.  searches on a pool are counted in whichever tick they finish and a PathService's aren't seen
+at all, there max_requests is what bounds them.  600 ticks of 500 swarm ghosts with distances (20, 60) and the shipped
+goals, run headless, average 60 ms a tick with max_requests 4, and 27 ms (42 ms p99) with a budget of 2000 vertices.
+with path_batch_size 1 as well, searches become flow fields and a budget of 4000 averages 16 ms
+
+tiers only change how often a ghost searches, every ghost still moves and checks its path each tick.  a path is walked
+by steering at one point of it at a time, and a far ghost moving several ticks' worth at once would overshoot the
+corners and ask again.  moving is what batched_ghosts makes cheap, see swarm.py
+
+the tiers are counted in a search from pacman's cell that stops at the last distance, so it's cheap enough to redo
+whenever pacman enters another cell
+"""
+from __future__ import annotations
+
+from typing import TYPE_CHECKING, Callable, Optional
+
+import numpy as np
+
+if TYPE_CHECKING:
+    from src.models.board import Board
+
+from src.models.config import *
+from src.models.pathfind import FlowField, Grid, normalize
+from src.models.profiling import profiler
+
+__all__ = ("LodScheduler",)
+
+
+class LodScheduler:
+    def __init__(self, distances: tuple[int, ...], repath_every: tuple[int, ...], offscreen_tiers: int = 1,
+                 max_requests: int = 0, budget: int = 0):
+        """
+        :param distances: steps to pacman where each tier after the first starts, ascending
+        :param repath_every: ticks between a ghost's chances to ask for a path, per tier.  the last is used for the
+        tiers past the end
+        :param offscreen_tiers: tiers a ghost drops while its top left is off the display
+        :param max_requests: searches asked for in one tick, 0 is no limit
+        :param budget: vertices searched in one tick after which the rest wait, 0 is no limit
+        """
+        self.distances = np.array(distances, dtype=np.int64)
+        self.repath_every = np.array([repath_every[min(i, len(repath_every) - 1)] for i in range(len(distances) + 1)],
+                                     dtype=np.int64)
+        self.offscreen_tiers = offscreen_tiers
+        self.max_requests = max_requests
+        self.budget = budget
+        self.counts = [0] * (len(distances) + 1)  # ghosts in each tier on the last tick
+        self.deferred = 0  # ghosts held back by max_requests or budget on the last tick
+        self._ticks = 0
+        self._owed = np.zeros(0, dtype=bool)  # told to search again or held back, and not yet allowed to
+        self._field: Optional[FlowField] = None
+
+    @classmethod
+    def from_config(cls) -> LodScheduler:
+        c = global_config()
+        return cls(c.lod_distances, c.lod_repath_every, c.lod_offscreen_tiers, c.max_path_requests, c.path_budget)
+
+    def field(self, board: Board) -> FlowField:
+        """
+        steps to pacman's cell.  the board's field when it keeps one up to date anyway, otherwise a search that stops
+        at the last tier's distance, which is redone whenever pacman enters another cell
+        """
+        if global_config().shared_flow_field:
+            return board.flow_field()
+        cell = normalize(board.pacman.pos)
+        if self._field is None or self._field.target != cell:
+            self._field = FlowField(board.data.boundary, cell, int(self.distances[-1]))
+        return self._field
+
+    def tiers(self, board: Board, xs: np.ndarray, ys: np.ndarray) -> np.ndarray:
+        """:return: each ghost's tier, 0 is closest"""
+        last = len(self.distances)
+        if not last:
+            return np.zeros(len(xs), dtype=np.int64)
+        grid_size = global_config().grid_size
+        distance = self.field(board).distance
+        cells_x = (np.ceil(xs / grid_size) * grid_size).astype(np.int64).tolist()  # normalize
+        cells_y = (np.ceil(ys / grid_size) * grid_size).astype(np.int64).tolist()
+        steps = np.array([distance.get(cell, -1) for cell in zip(cells_x, cells_y)], dtype=np.int64)
+        tiers = np.searchsorted(self.distances, steps, side="right")  # a tier starts at its distance
+        tiers[steps < 0] = last  # pacman can't be reached from there, or it's past the last tier
+        width, height = global_config().screen_dimensions
+        offscreen = (xs < 0) | (xs >= width) | (ys < 0) | (ys >= height)
+        tiers[offscreen] = np.minimum(tiers[offscreen] + self.offscreen_tiers, last)
+        return tiers
+
+    def select(self, board: Board, xs: np.ndarray, ys: np.ndarray, wants: np.ndarray, remaining: np.ndarray,
+               forced: bool = False, skip: np.ndarray | None = None) -> np.ndarray:
+        """
+        which ghosts may ask for a path this tick, to be handed to dispatch
+
+        :param wants: the ghosts that can_pathfind
+        :param remaining: moves each ghost has left
+        :param forced: the mode changed, every ghost searches again as soon as it's allowed to
+        :param skip: ghosts left out this tick, whatever they want
+        :return: their indices, in the order they should ask
+        """
+        n = len(xs)
+        if len(self._owed) != n:
+            self._owed = np.zeros(n, dtype=bool)
+        if forced:
+            self._owed[:] = True
+        tiers = self.tiers(board, xs, ys)
+        self.counts = np.bincount(tiers, minlength=len(self.counts)).tolist()
+
+        every = self.repath_every[tiers]
+        due = (self._ticks + np.arange(n)) % every == 0  # spread over the ticks, not all on the same one
+        self._ticks += 1
+        asking = wants & due | self._owed
+        if skip is not None:
+            asking &= ~skip
+        chosen = np.flatnonzero(asking)
+        chosen = chosen[np.lexsort((remaining[chosen], tiers[chosen]))]
+        self.deferred = 0
+        if self.max_requests and len(chosen) > self.max_requests:
+            self.deferred = len(chosen) - self.max_requests
+            chosen = chosen[:self.max_requests]
+
+        if profiler.enabled:
+            for tier, count in enumerate(self.counts):
+                profiler.record(f"lod.tier{tier}", count)
+        return chosen
+
+    def dispatch(self, chosen: np.ndarray, ask: Callable[[int], None], grid: Grid) -> int:
+        """
+        calls ask for the ghosts select chose, in order, until the budget is spent.  the first always asks, so some
+        ghost gets a path every tick however long a search is.  the ones left owe a search and ask the next tick
+
+        :param grid: the grid ask searches, whose searched count is the budget's
+        :return: how many asked
+        """
+        start = grid.searched
+        asked = 0
+        for i in chosen:
+            if asked and self.budget and grid.searched - start >= self.budget:
+                break
+            ask(int(i))
+            self._owed[i] = False
+            asked += 1
+        self._owed[chosen[asked:]] = True
+        self.deferred += len(chosen) - asked
+
+        if profiler.enabled:
+            profiler.record("lod.deferred", self.deferred)
+        return asked
@@ -0,0 +1,164 @@
+"""
+generated boards.  the maze is laid out like the shipped one: square cells as wide as a sprite, on the grid, with a
+grid_size thick wall between neighbouring cells that is knocked through where there is a passage.  a random spanning
+tree connects every cell, `density` opens some of the remaining walls to make loops and the ghosts start in a room in
+the middle whose only door is a pacman wall
+"""
+from __future__ import annotations
+
+import math
+import random
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pygame as pg
+
+from src.models.assets import fetch_surface
+from src.models.config import *
+
+__all__ = ("Maze", "generate_maze")
+
+BACKGROUND: Color = (25, 29, 49)  # what the board surface is drawn with
+WALL: Color = (95, 56, 112)
+DOOR: Color = (255, 178, 246)
+
+# lattice values
+_OPEN, _WALL, _DOOR, _ROOM = 0, 1, 2, 3
+
+
+@dataclass(slots=True)
+class Maze:
+    information: pg.Surface  # for BoardData.from_surface
+    board: pg.Surface  # the background Board draws on
+
+    def data(self) -> BoardData:
+        return BoardData.from_surface(self.information)
+
+
+def _spanning_tree(cols: int, rows: int, blocked: np.ndarray, rng: random.Random) -> tuple[np.ndarray, np.ndarray]:
+    """
+    a depth first maze over the cells that aren't blocked
+
+    :return: [x][y] whether each cell has a passage to its right and to the cell below
+    """
+    east = np.zeros((cols, rows), dtype=bool)
+    south = np.zeros((cols, rows), dtype=bool)
+    visited = blocked.copy()
+    start = next((x, y) for x, y in zip(*np.nonzero(~blocked)))
+    visited[start] = True
+    stack = [start]
+    while stack:
+        x, y = stack[-1]
+        options = [(nx, ny) for nx, ny in ((x + 1, y), (x - 1, y), (x, y + 1), (x, y - 1))
+                   if 0 <= nx < cols and 0 <= ny < rows and not visited[nx, ny]]
+        if not options:
+            stack.pop()
+            continue
+        nx, ny = rng.choice(options)
+        if nx != x:
+            east[min(x, nx), y] = True
+        else:
+            south[x, min(y, ny)] = True
+        visited[nx, ny] = True
+        stack.append((nx, ny))
+    return east, south
+
+
+def generate_maze(size: tuple[int, int], density: float = .1, seed: Optional[int] = None, ghosts: Optional[int] = None,
+                  pacman_spawns: int = 10, scatters: Optional[int] = None) -> Maze:
+    """
+    builds a board in the colors of the global config's BoardConfig
+
+    :param size: in pixels, anything from a few cells up to 10k by 10k
+    :param density: the chance each wall between two cells that the spanning tree left standing is opened, 0 is a
+    perfect maze where every two cells have exactly one route between them
+    :param seed: the same seed, size and config give the same maze
+    :param ghosts: spawn locations in the ghost room, one per ghost sprite by default
+    :param scatters: one per 20 cells by default
+    """
+    c = global_config()
+    board = c.board
+    rng = random.Random(seed)
+    np_rng = np.random.default_rng(rng.getrandbits(64))
+    ghosts = len(board.ghosts()) if ghosts is None else ghosts
+
+    # everything is on a lattice of grid_size squares, scaled up at the end
+    unit = c.grid_size
+    sprite = max(fetch_surface(path).get_size()[i] for path in (board.pacman_path, *board.ghosts()) for i in (0, 1))
+    cell = math.ceil(sprite / unit)  # lattice squares across a corridor
+    period = cell + 1
+    width, height = size[0] // unit, size[1] // unit
+    cols, rows = (width - cell) // period + 1, (height - cell) // period + 1
+
+    room_cols, room_rows = max(1, math.ceil(ghosts / 2)), min(2, ghosts)
+    if cols < room_cols + 2 or rows < room_rows + 2:
+        raise ValueError(f"{size} is too small for a maze")
+    room = np.zeros((cols, rows), dtype=bool)
+    room_x, room_y = (cols - room_cols) // 2, (rows - room_rows) // 2
+    room[room_x:room_x + room_cols, room_y:room_y + room_rows] = True
+
+    east, south = _spanning_tree(cols, rows, room, rng)
+    outside = ~room
+    east[:-1] |= (np_rng.random((cols - 1, rows)) < density) & outside[:-1] & outside[1:]
+    south[:, :-1] |= (np_rng.random((cols, rows - 1)) < density) & outside[:, :-1] & outside[:, 1:]
+
+    # [x][y], a part square left over at the edges is wall
+    lattice = np.full((-(-size[0] // unit), -(-size[1] // unit)), _WALL, dtype=np.uint8)
+    xs, ys = np.arange(cols) * period, np.arange(rows) * period
+    for dx in range(cell):
+        for dy in range(cell):
+            lattice[np.ix_(xs + dx, ys + dy)] = _OPEN
+    for dx in range(cell):
+        passages = lattice[np.ix_(xs + dx, ys[:-1] + cell)]
+        passages[south[:, :-1]] = _OPEN
+        lattice[np.ix_(xs + dx, ys[:-1] + cell)] = passages
+    for dy in range(cell):
+        passages = lattice[np.ix_(xs[:-1] + cell, ys + dy)]
+        passages[east[:-1]] = _OPEN
+        lattice[np.ix_(xs[:-1] + cell, ys + dy)] = passages
+
+    if ghosts:
+        left, top = room_x * period, room_y * period
+        lattice[left:left + room_cols * period - 1, top:top + room_rows * period - 1] = _ROOM
+        door = (room_x + room_cols // 2) * period
+        lattice[door:door + cell, top - 1] = _DOOR
+
+    information = _scaled(lattice, unit, size, {
+        _OPEN: (0, 0, 0, 0),
+        _WALL: (*board.wall_color, 255),
+        _DOOR: (*board.pacman_wall_color, 255),
+        _ROOM: (0, 0, 0, 255),  # opaque so no points are placed inside
+    })
+    surface = _scaled(lattice, unit, size, {_OPEN: BACKGROUND, _WALL: WALL, _DOOR: DOOR, _ROOM: BACKGROUND})
+
+    def mark(cells: list[tuple[int, int]], color: Color) -> None:
+        for x, y in cells:
+            information.set_at((int(x) * period * unit, int(y) * period * unit), color)
+
+    room_cells = list(zip(*np.nonzero(room)))
+    mark(sorted(room_cells, key=lambda p: (p[1], p[0]))[:ghosts], board.ghost_spawn_color)
+    free = list(zip(*np.nonzero(outside)))
+    picked = rng.sample(free, min(len(free), pacman_spawns + (cols * rows // 20 if scatters is None else scatters)))
+    mark(picked[:pacman_spawns], board.pacman_spawn_color)
+    mark(picked[pacman_spawns:], board.scatter_color)
+    return Maze(information, surface)
+
+
+def _scaled(lattice: np.ndarray, unit: int, size: tuple[int, int], colors: dict[int, tuple[int, ...]]) -> pg.Surface:
+    """the lattice drawn a pixel per square then scaled up and cut to size"""
+    alpha = any(len(color) == 4 for color in colors.values())
+    small = pg.Surface(lattice.shape, flags=pg.SRCALPHA if alpha else 0)
+    rgb = pg.surfarray.pixels3d(small)
+    for value, color in colors.items():
+        rgb[lattice == value] = color[:3]
+    del rgb
+    if alpha:
+        a = pg.surfarray.pixels_alpha(small)
+        for value, color in colors.items():
+            a[lattice == value] = color[3]
+        del a
+
+    # scale doesn't filter, every square comes out as unit by unit copies of its pixel
+    scaled = pg.transform.scale(small, (lattice.shape[0] * unit, lattice.shape[1] * unit))
+    return scaled.subsurface(pg.Rect((0, 0), size)).copy()
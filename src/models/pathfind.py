@@ -1,18 +1,26 @@
 from __future__ import annotations
 import dataclasses
+import functools
 import heapq
 import math
+import random
+import threading
+from collections import OrderedDict
 from enum import Enum
-from typing import TypeAlias, TYPE_CHECKING
+from pathlib import Path
+from typing import TypeAlias, TYPE_CHECKING, Optional, Callable
 
 import numpy as np
 
 if TYPE_CHECKING:
     from src.models.config import *
+    from src.models.corridors import CorridorGraph
+    from src.models.hierarchy import Hierarchy
 
 import src.models.config as config
+from src.models.profiling import profiled
 
-Matrix: TypeAlias = list[list[int]]  # False == wall
+Matrix: TypeAlias = "list[list[int]] | np.ndarray"  # False == wall
 
 
 @dataclasses.dataclass()
@@ -24,16 +32,41 @@ def is_wall(matrix: Matrix, x, y) -> bool:
     return not matrix[y][x]
 
 
+def boundary_matrix(walls: np.ndarray, grid_size: int) -> np.ndarray:
+    """
+    :param walls: [x][y], true where there is a wall
+    :return: the [y][x] matrix Grid is built from.  pixels off the grid lines are -1, they are never looked at
+    """
+    width, height = walls.shape
+    boundary = np.ones((height, width), dtype=np.int8)
+    boundary[(np.arange(height) % grid_size != 0)[:, None] & (np.arange(width) % grid_size != 0)[None, :]] = -1
+    boundary[walls.T] = False
+    return boundary
+
+
 def cross_sections(matrix: Matrix, grid_size: int) -> dict[Point, Vertex]:
+    matrix = np.asarray(matrix).astype(bool)
+    height, width = matrix.shape
+    ys = np.arange(0, height, grid_size)
+    xs = np.arange(0, width, grid_size)
+
+    # the pixel one step towards each neighbour decides if the edge exists, out of range steps wrap around
+    opened = matrix[np.ix_(ys, xs)].tolist()
+    steps = [
+        matrix[np.ix_((ys - 1) % height, xs)].tolist(),
+        matrix[np.ix_((ys + 1) % height, xs)].tolist(),
+        matrix[np.ix_(ys, (xs + 1) % width)].tolist(),
+        matrix[np.ix_(ys, (xs - 1) % width)].tolist(),
+    ]
+
     vertices: dict[Point, Vertex] = {}
-    for y in range(0, len(matrix), grid_size):
-        for x in range(0, len(matrix[0]), grid_size):
-            if is_wall(matrix, x, y):
+    for iy, y in enumerate(ys.tolist()):
+        for ix, x in enumerate(xs.tolist()):
+            if not opened[iy][ix]:
                 continue
-            p = [(x, y-1), (x, y+1), (x+1, y), (x-1, y)]
             c = [(x, y-grid_size), (x, y+grid_size), (x+grid_size, y), (x-grid_size, y)]
             vertices[(x, y)] = Vertex(
-                [pc for pp, pc in zip(p, c) if not is_wall(matrix, pp[0], pp[1])]
+                [pc for step, pc in zip(steps, c) if step[iy][ix]]
             )
 
     return vertices
@@ -70,40 +103,269 @@ def reconstruct_path(came_from: dict[Point, Point], current: Point) -> list[Poin
     return total_path[::-1]
 
 
-class Grid:
-    def __init__(self, matrix: list[list[int]], grid_size: int):  # setup [y][x] False == wall
-        self._vertices = cross_sections(matrix, grid_size)
+class VertexIndex:
+    """
+    the vertices as arrays, bucketed into square cells, so goals can pick targets in bounded time instead of probing the
+    screen until they hit a vertex
+    """
+    def __init__(self, points: list[Point], bucket: int):
+        points = np.array(points, dtype=np.int64).reshape(-1, 2)
+        cells = points // bucket
+        order = np.lexsort((cells[:, 1], cells[:, 0]))
+        self.points = points[order]
+        self.bucket = bucket
+        self._cells, self._starts = np.unique(cells[order], axis=0, return_index=True)
+        self._ends = np.append(self._starts[1:], len(self.points))
+
+    def random(self) -> Point:
+        x, y = self.points[random.randrange(len(self.points))].tolist()
+        return x, y
+
+    def nearest_at_distance(self, center: Point, distance: float) -> Point:
+        """:return: the vertex whose distance from center is closest to distance"""
+        if not len(self.points):
+            return center
+        cx, cy = center
+        lo = self._cells * self.bucket
+        hi = lo + self.bucket
+        # how far the nearest and farthest spot of each cell is from center bounds how close its vertices can get
+        near = np.hypot(np.maximum(np.maximum(lo[:, 0] - cx, cx - hi[:, 0]), 0),
+                        np.maximum(np.maximum(lo[:, 1] - cy, cy - hi[:, 1]), 0))
+        far = np.hypot(np.maximum(np.abs(lo[:, 0] - cx), np.abs(hi[:, 0] - cx)),
+                       np.maximum(np.abs(lo[:, 1] - cy), np.abs(hi[:, 1] - cy)))
+        bound = np.maximum(np.maximum(near - distance, distance - far), 0)
+
+        best, best_error = None, math.inf
+        for cell in np.argsort(bound, kind="stable").tolist():
+            if bound[cell] >= best_error:
+                break
+            points = self.points[self._starts[cell]:self._ends[cell]]
+            errors = np.abs(np.hypot(points[:, 0] - cx, points[:, 1] - cy) - distance)
+            if errors[i := int(np.argmin(errors))] < best_error:
+                best, best_error = points[i], errors[i]
+        x, y = best.tolist()
+        return x, y
+
+
+class FlowField:
+    """
+    every vertex's next step towards one target, from a single breadth first search over the reversed edges.  any
+    number of searches towards that target are then walks through the field
+    """
+    def __init__(self, grid: Grid, target: Point, max_steps: Optional[int] = None):
+        """:param max_steps: the search stops this many steps out, points further away are left out of the field"""
+        self.target = target
+        self.next_hop: dict[Point, Point] = {target: target}
+        self.distance: dict[Point, int] = {target: 0}
+        reverse = grid.reverse_neighbors
+        frontier = [target]
+        steps = 0
+        while frontier and (max_steps is None or steps < max_steps):
+            steps += 1
+            following = []
+            for v in frontier:
+                for u in reverse.get(v, ()):
+                    if u not in self.next_hop:
+                        self.next_hop[u] = v
+                        self.distance[u] = steps
+                        following.append(u)
+            frontier = following
+        grid.searched += len(self.distance)
+
+    def path(self, start: Point) -> list[Point]:
+        """the same as Grid.get_path(start, target), empty when start is past max_steps or can't reach the target"""
+        current = normalize(start)
+        if current not in self.next_hop:
+            return []
+        path = [current]
+        while current != self.target:
+            current = self.next_hop[current]
+            path.append(current)
+        return path
+
+
+class PathCache:
+    """a bounded least recently used map of paths, safe to share between the threads of get_pool()"""
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._paths: OrderedDict[tuple[Point, Point, SortingPath], tuple[Point, ...]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: tuple[Point, Point, SortingPath]) -> Optional[list[Point]]:
+        with self._lock:
+            path = self._paths.get(key)
+            if path is None:
+                self.misses += 1
+                return None
+            self._paths.move_to_end(key)
+            self.hits += 1
+        return list(path)  # callers consume their moves in place
+
+    def put(self, key: tuple[Point, Point, SortingPath], path: list[Point]) -> None:
+        with self._lock:
+            self._paths[key] = tuple(path)
+            self._paths.move_to_end(key)
+            while len(self._paths) > self.maxsize:
+                self._paths.popitem(last=False)
+                self.evictions += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {"hits": self.hits, "misses": self.misses, "evictions": self.evictions, "size": len(self._paths)}
+
+
+_STEPS = ((0, -1), (0, 1), (1, 0), (-1, 0))  # the order cross_sections lists neighbours in
+_CHECK_EVERY = 256  # expansions between asking whether a search was cancelled
 
-    def _a_star(self, start: Point, goal: Point, h: SortingPath):
-        # modification of https://en.wikipedia.org/wiki/A*_search_algorithm#Pseudocode
-        stack: list[tuple[float, Point]] = []
 
+class Grid:
+    def __init__(self, matrix: Optional[Matrix], grid_size: int,
+                 vertices: Optional[dict[Point, Vertex]] = None):  # setup [y][x] False == wall
+        self.grid_size = grid_size
+        self._vertices = cross_sections(matrix, grid_size) if vertices is None else vertices
+        self.cache: Optional[PathCache] = None
+        self.hierarchy: Optional[Hierarchy] = None  # searched instead of the vertices when set
+        self.corridors: Optional[CorridorGraph] = None  # same, used when there is no hierarchy
+        self.searched = 0  # vertices the searches over this grid have visited, a cost that is the same every run
+        # all pairs tables, see precompute.  indexed [target][source]
+        self._points: list[Point] = []
+        self._index: dict[Point, int] = {}
+        self._distances: Optional[np.ndarray] = None
+        self._next_hop: Optional[np.ndarray] = None
+
+    def to_arrays(self) -> tuple[np.ndarray, np.ndarray]:
+        """:return: the vertices as an (n, 2) array and a bit per neighbour direction, in cross_sections order"""
+        points = np.array(list(self._vertices), dtype=np.int32).reshape(-1, 2)
+        flags = np.zeros(len(points), dtype=np.uint8)
+        for i, ((x, y), vertex) in enumerate(self._vertices.items()):
+            for bit, (dx, dy) in enumerate(_STEPS):
+                if (x + dx * self.grid_size, y + dy * self.grid_size) in vertex.valid_vertices:
+                    flags[i] |= 1 << bit
+        return points, flags
+
+    @classmethod
+    def from_arrays(cls, points: np.ndarray, flags: np.ndarray, grid_size: int) -> Grid:
+        vertices = {}
+        for (x, y), flag in zip(points.tolist(), flags.tolist()):
+            vertices[(x, y)] = Vertex([(x + dx * grid_size, y + dy * grid_size)
+                                       for bit, (dx, dy) in enumerate(_STEPS) if flag >> bit & 1])
+        return cls(None, grid_size, vertices)
+
+    def _reverse_edges(self) -> list[list[int]]:
+        index = {p: i for i, p in enumerate(self._vertices)}
+        reverse: list[list[int]] = [[] for _ in index]
+        for i, vertex in enumerate(self._vertices.values()):
+            for neighbor in vertex.valid_vertices:
+                if neighbor in index:
+                    reverse[index[neighbor]].append(i)
+        return reverse
+
+    def _all_pairs(self) -> tuple[np.ndarray, np.ndarray]:
+        # a breadth first search towards every vertex over the reversed edges, so the parent of a vertex is the next
+        # step it takes towards the target
+        n = len(self._vertices)
+        dtype = np.int16 if n <= np.iinfo(np.int16).max else np.int32
+        distances = np.full((n, n), -1, dtype=dtype)
+        next_hop = np.full((n, n), -1, dtype=dtype)
+        reverse = self._reverse_edges()
+        for target in range(n):
+            dist = [-1] * n
+            hop = [-1] * n
+            dist[target] = 0
+            hop[target] = target
+            frontier = [target]
+            steps = 0
+            while frontier:
+                steps += 1
+                following = []
+                for v in frontier:
+                    for u in reverse[v]:
+                        if dist[u] < 0:
+                            dist[u] = steps
+                            hop[u] = v
+                            following.append(u)
+                frontier = following
+            distances[target] = dist
+            next_hop[target] = hop
+        return distances, next_hop
+
+    def precompute(self, path: Optional[Path] = None, key: str = "") -> None:
+        """
+        builds distance and next hop tables over every pair of vertices so get_path becomes a table walk
+
+        :param path: where the tables are cached, they are only rebuilt when the stored key or vertices differ
+        :param key: identifies the board the tables belong to
+        """
+        points = np.array(list(self._vertices), dtype=np.int32).reshape(-1, 2)
+        if path is not None and path.exists():
+            with np.load(path) as tables:
+                if str(tables["key"]) == key and np.array_equal(tables["points"], points):
+                    self.use_tables(tables["distances"], tables["next_hop"])
+                    return
+
+        self.use_tables(*self._all_pairs())
+        if path is not None:
+            np.savez(path, key=np.array(key), points=points, distances=self._distances, next_hop=self._next_hop)
+
+    @property
+    def tables(self) -> Optional[tuple[np.ndarray, np.ndarray]]:
+        """the distance and next hop tables, once precomputed"""
+        return None if self._next_hop is None else (self._distances, self._next_hop)
+
+    def use_tables(self, distances: np.ndarray, next_hop: np.ndarray) -> None:
+        """walks these tables from now on, as they are and without a copy.  they're indexed in the vertices' order"""
+        self._points = list(self._vertices)
+        self._index = {p: i for i, p in enumerate(self._points)}
+        self._distances, self._next_hop = distances, next_hop
+
+    def _walk(self, start: int, goal: int) -> list[Point]:
+        if self._distances[goal, start] < 0:
+            return []
+        hops = self._next_hop[goal]
+        path = [self._points[start]]
+        while start != goal:
+            start = hops[start]
+            path.append(self._points[start])
+        self.searched += len(path)
+        return path
+
+    def _a_star(self, start: Point, goal: Point, h: SortingPath,
+                cancelled: Optional[Callable[[], bool]] = None) -> Optional[list[Point]]:
+        """:param cancelled: asked now and then, the search gives up and returns None once it's true"""
+        # modification of https://en.wikipedia.org/wiki/A*_search_algorithm#Pseudocode
+        # every edge is exactly one grid step, and both heuristics change by at most one step per edge, so they are
+        # consistent: a node popped for the first time is settled and later (stale) heap entries for it are skipped
+        step = self.grid_size
+        heap: list[tuple[int, int, Point]] = [(h.heuristic(start, goal), 0, start)]
         came_from: dict[Point, Point] = {}
         g_score = {start: 0}
+        closed: set[Point] = set()
 
-        f_score = {start: h.heuristic(start, goal)}
-
-        heapq.heappush(stack, (f_score[start], start))
-
-        while len(stack):
-            current: Point = heapq.heappop(stack)[-1]  # the node in openSet having the lowest fScore[] value
+        while heap:
+            _, g, current = heapq.heappop(heap)
+            if current in closed:
+                continue
             if current == goal:
+                self.searched += len(closed)
                 return reconstruct_path(came_from, current)
+            closed.add(current)
+            if cancelled is not None and len(closed) % _CHECK_EVERY == 0 and cancelled():
+                self.searched += len(closed)
+                return None
 
-            for i, x in enumerate(stack):
-                if x[-1] == current:
-                    stack.pop(i)
-                    break
-            if current not in self._vertices:
+            vertex = self._vertices.get(current)
+            if vertex is None:
                 continue
-            for neighbor in self._vertices[current].valid_vertices:
-                tentative_score = g_score.get(current, math.inf) + h.distance(current, neighbor)
-                if tentative_score < g_score.get(neighbor, math.inf):
+            tentative_score = g + step
+            for neighbor in vertex.valid_vertices:
+                if neighbor not in closed and tentative_score < g_score.get(neighbor, math.inf):
                     came_from[neighbor] = current
                     g_score[neighbor] = tentative_score
-                    f_score[neighbor] = tentative_score + h.heuristic(neighbor, goal)
-                    if neighbor not in [i[-1] for i in stack]:
-                        heapq.heappush(stack, (f_score.get(neighbor, math.inf), neighbor))
+                    heapq.heappush(heap, (tentative_score + h.heuristic(neighbor, goal), tentative_score, neighbor))
+        self.searched += len(closed)
         return []
 
     """def _path(self, start: Point, end: Point, path: list[Point], visited: set[Point]) -> bool:
@@ -121,8 +383,42 @@ class Grid:
                 return True
         return False"""
 
-    def get_path(self, start: Point, end: Point, sorting_path: SortingPath = SortingPath.FARTHEST) -> list[Point]:
-        return self._a_star(normalize(start), normalize(end), sorting_path)
+    @profiled("grid.get_path")
+    def get_path(self, start: Point, end: Point, sorting_path: SortingPath = SortingPath.FARTHEST,
+                 cancelled: Optional[Callable[[], bool]] = None) -> Optional[list[Point]]:
+        """
+        :param cancelled: handed to _a_star, so only a plain search gives up part way.  the other modes are quick
+        :return: None only when cancelled
+        """
+        start, end = normalize(start), normalize(end)
+        key = (start, end, sorting_path)
+        if self.cache is not None and (path := self.cache.get(key)) is not None:
+            return path
+
+        if self._next_hop is not None and start in self._index and end in self._index:
+            path = self._walk(self._index[start], self._index[end])
+        elif self.hierarchy is not None:
+            path = self.hierarchy.get_path(start, end)
+        elif self.corridors is not None:
+            path = self.corridors.get_path(start, end)
+        else:
+            path = self._a_star(start, end, sorting_path, cancelled)
+        if self.cache is not None and path is not None:
+            self.cache.put(key, path)
+        return path
+
+    @functools.cached_property
+    def reverse_neighbors(self) -> dict[Point, list[Point]]:
+        """the points that have an edge into each point"""
+        reverse: dict[Point, list[Point]] = {}
+        for point, vertex in self._vertices.items():
+            for neighbor in vertex.valid_vertices:
+                reverse.setdefault(neighbor, []).append(point)
+        return reverse
+
+    @functools.cached_property
+    def vertex_index(self) -> VertexIndex:
+        return VertexIndex(list(self._vertices), self.grid_size * 8)
 
     def valid_point(self, point: Point) -> bool:
         return normalize(point) in self._vertices
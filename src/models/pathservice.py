@@ -0,0 +1,229 @@
+"""
+pathfinding in worker processes.  the graph is copied into shared memory once and every worker attaches to it, so a
+request only sends two points.  each owner (a ghost) has at most one live request: asking again supersedes the old one,
+which is dropped if it hasn't been handed to a worker yet and abandoned mid search if it has.  pending requests go to
+workers in priority order, lowest first
+
+workers search with Grid.get_path, so they take the same route through the precomputed tables, the hierarchy or the
+corridors as the grid the service was made for.  the tables are walked in shared memory where they are.  the vertices
+are read into a Grid in each worker, as are a hierarchy or corridor graph built over them, being small next to the
+tables and far slower to search through numpy.  the grid's PathCache is looked up and filled here, before and after
+the workers
+"""
+from __future__ import annotations
+
+import heapq
+import itertools
+import multiprocessing as mp
+import queue
+import time
+from multiprocessing import shared_memory
+from typing import Optional
+
+import numpy as np
+
+from src.models.config import *
+from src.models.corridors import CorridorGraph
+from src.models.hierarchy import Hierarchy
+from src.models.pathfind import Grid, SortingPath, normalize
+from src.models.profiling import profiler
+
+__all__ = ("PathService", "PathRequest")
+
+
+class _SharedArray:
+    def __init__(self, array: np.ndarray):
+        self.memory = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self.spec = (self.memory.name, array.shape, array.dtype.str)
+        np.ndarray(array.shape, array.dtype, buffer=self.memory.buf)[...] = array
+
+    def close(self) -> None:
+        self.memory.close()
+        self.memory.unlink()
+
+
+def _attach(spec: tuple[str, tuple, str]) -> tuple[shared_memory.SharedMemory, np.ndarray]:
+    name, shape, dtype = spec
+    memory = shared_memory.SharedMemory(name=name)
+    return memory, np.ndarray(shape, dtype, buffer=memory.buf)
+
+
+def _worker(points_spec, flags_spec, tables_specs, generations_spec, step: int, layers: tuple[int, int, bool], tasks,
+            results) -> None:
+    """
+    :param tables_specs: the distance and next hop tables, None when the grid has none
+    :param layers: the hierarchy's cluster and refine, 0 cluster is none, and whether there is a corridor graph
+    """
+    memories = []
+
+    def attach(spec) -> np.ndarray:
+        memory, array = _attach(spec)
+        memories.append(memory)
+        return array
+
+    grid = Grid.from_arrays(attach(points_spec), attach(flags_spec), step)
+    if tables_specs is not None:
+        grid.use_tables(*(attach(spec) for spec in tables_specs))
+    cluster, refine, corridors = layers
+    if cluster:
+        grid.hierarchy = Hierarchy(grid, cluster, refine)
+    if corridors:
+        grid.corridors = CorridorGraph(grid)
+    generations = attach(generations_spec)
+
+    while (task := tasks.get()) is not None:
+        slot, generation, start, goal, h = task
+        path = None
+        if generations[slot] == generation:
+            path = grid.get_path(start, goal, h, lambda: generations[slot] != generation)
+        results.put((slot, generation, path))
+    del grid, generations  # nothing may point into the memory once it's closed
+    for memory in memories:
+        memory.close()
+
+
+class PathRequest:
+    def __init__(self, service: PathService, slot: int, generation: int, key: tuple[Point, Point, SortingPath]):
+        self.service = service
+        self.slot = slot
+        self.generation = generation
+        self.key = key
+        self.path: Optional[list[Point]] = None
+        self.done = False
+        self.asked = time.perf_counter()
+
+    @property
+    def is_superseded(self) -> bool:
+        return self.service.generations[self.slot] != self.generation
+
+    def ready(self) -> bool:
+        """never true once the service is closed, unless the path was already back"""
+        if not self.done and not self.service.closed:
+            self.service.poll()
+        return self.done
+
+    def get(self) -> list[Point]:
+        while not self.ready():
+            if self.is_superseded:
+                raise ValueError("request was superseded")
+            if self.service.closed:
+                raise ValueError("PathService was closed before the path came back")
+            self.service.poll(block=True)
+        return self.path
+
+
+class PathService:
+    """
+    a process pool for Grid searches, used by AIEntity in place of get_pool() when Config.process_pathfinding is set
+    """
+    def __init__(self, grid: Grid, processes: Optional[int] = None, slots: int = 1024):
+        points, flags = grid.to_arrays()
+        self._points = _SharedArray(points)
+        self._flags = _SharedArray(flags)
+        self._tables = [] if grid.tables is None else [_SharedArray(table) for table in grid.tables]
+        self._generations = _SharedArray(np.zeros(slots, dtype=np.int64))
+        self.generations = np.ndarray((slots,), np.int64, buffer=self._generations.memory.buf)
+        self.cache = grid.cache
+        self.closed = False
+
+        self._slots: dict[int, int] = {}  # id(owner) -> slot
+        self._live: dict[int, PathRequest] = {}  # slot -> newest request
+        self._pending: list[tuple[float, int, int, int, Point, Point, SortingPath]] = []
+        self._counter = itertools.count()
+        self._in_flight = 0
+
+        cluster, refine = (grid.hierarchy.cluster, grid.hierarchy.refine) if grid.hierarchy else (0, 0)
+        layers = (cluster, refine, grid.corridors is not None)
+        self._tasks = mp.Queue()
+        self._results = mp.Queue()
+        self._workers = [
+            mp.Process(target=_worker, daemon=True, args=(
+                self._points.spec, self._flags.spec, [table.spec for table in self._tables] or None,
+                self._generations.spec, grid.grid_size, layers, self._tasks, self._results))
+            for _ in range(processes or mp.cpu_count())
+        ]
+        for worker in self._workers:
+            worker.start()
+
+    def _slot(self, owner) -> int:
+        if id(owner) not in self._slots:
+            if len(self._slots) == len(self.generations):
+                raise ValueError(f"PathService has room for {len(self.generations)} owners")
+            self._slots[id(owner)] = len(self._slots)
+        return self._slots[id(owner)]
+
+    def request(self, owner, start: Point, goal: Point, priority: float = 0.,
+                sorting_path: SortingPath = SortingPath.FARTHEST) -> PathRequest:
+        """
+        asks for a path for owner, superseding its previous request
+
+        :param priority: lower goes first
+        """
+        if self.closed:
+            raise ValueError("PathService is closed")
+        slot = self._slot(owner)
+        self.generations[slot] += 1
+        start, goal = normalize(start), normalize(goal)
+        request = PathRequest(self, slot, int(self.generations[slot]), (start, goal, sorting_path))
+        if self.cache is not None and (path := self.cache.get(request.key)) is not None:
+            self._deliver(request, path)
+            return request
+        self._live[slot] = request
+        heapq.heappush(self._pending, (priority, next(self._counter), slot, request.generation,
+                                       start, goal, sorting_path))
+        self.poll()
+        return request
+
+    def _deliver(self, request: PathRequest, path: list[Point]) -> None:
+        request.path, request.done = path, True
+        if profiler.enabled:  # under get_path's name, from asking to the path being back
+            profiler.record("grid.get_path", (time.perf_counter() - request.asked) * 1000)
+
+    @property
+    def pending(self) -> int:
+        """requests not yet handed to a worker, superseded ones included until they are skipped"""
+        return len(self._pending)
+
+    def poll(self, block: bool = False) -> None:
+        """collects finished searches and hands pending requests to idle workers"""
+        while self._in_flight:
+            try:
+                slot, generation, path = self._results.get(block=block, timeout=1 if block else None)
+            except queue.Empty:
+                break
+            block = False
+            self._in_flight -= 1
+            request = self._live.get(slot)
+            if request is not None and request.generation == generation and path is not None:
+                del self._live[slot]
+                if self.cache is not None:
+                    self.cache.put(request.key, path)
+                self._deliver(request, path)
+
+        while self._pending and self._in_flight < len(self._workers):
+            _, _, slot, generation, start, goal, sorting_path = heapq.heappop(self._pending)
+            if self.generations[slot] != generation:
+                continue  # superseded before it was sent
+            self._tasks.put((slot, generation, start, goal, sorting_path))
+            self._in_flight += 1
+
+    def close(self) -> None:
+        """stops the workers.  requests still out never become ready, but can be asked whether they were superseded"""
+        if self.closed:
+            return
+        self.closed = True
+        for _ in self._workers:
+            self._tasks.put(None)
+        for worker in self._workers:
+            worker.join(timeout=5)
+            if worker.is_alive():
+                worker.terminate()
+        self.generations = self.generations.copy()  # off the shared memory, which is about to go
+        for shared in (self._points, self._flags, *self._tables, self._generations):
+            shared.close()
+
+    def __enter__(self) -> PathService:
+        return self
+
+    def __exit__(self, *args) -> None:
+        self.close()
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import csv
+import functools
+import json
+import time
+from collections import deque
+from pathlib import Path
+from typing import Callable, Optional, TypeVar
+
+import numpy as np
+import pygame as pg
+
+__all__ = ("Histogram", "Profiler", "profiler", "profiled", "ProfileOverlay")
+
+F = TypeVar("F", bound=Callable)
+
+PERCENTILES = (50, 90, 99)
+
+
+class Histogram:
+    """the last `size` samples of something, with a running count"""
+    def __init__(self, size: int = 600):
+        self.samples: deque[float] = deque(maxlen=size)
+        self.count = 0
+
+    def add(self, value: float) -> None:
+        self.samples.append(value)  # deque appends are atomic, pool threads record into these too
+        self.count += 1
+
+    def summary(self) -> dict[str, float]:
+        samples = np.array(self.samples, dtype=np.float64)
+        if not len(samples):
+            return {"count": self.count}
+        summary = {"count": self.count, "mean": float(samples.mean()), "max": float(samples.max())}
+        for p, value in zip(PERCENTILES, np.percentile(samples, PERCENTILES).tolist()):
+            summary[f"p{p}"] = value
+        return summary
+
+
+class Profiler:
+    def __init__(self, size: int = 600):
+        self.enabled = False
+        self.size = size
+        self.histograms: dict[str, Histogram] = {}
+
+    def record(self, name: str, value: float) -> None:
+        if (histogram := self.histograms.get(name)) is None:
+            histogram = self.histograms.setdefault(name, Histogram(self.size))
+        histogram.add(value)
+
+    def summary(self) -> dict[str, dict[str, float]]:
+        return {name: histogram.summary() for name, histogram in sorted(self.histograms.items())}
+
+    def export(self, path: str | Path) -> None:
+        """writes the summary as json, or as csv when path ends in .csv"""
+        summary = self.summary()
+        if str(path).endswith(".csv"):
+            fields = ["name", "count", "mean", *(f"p{p}" for p in PERCENTILES), "max"]
+            with open(path, "w", newline="") as f:
+                writer = csv.DictWriter(f, fieldnames=fields)
+                writer.writeheader()
+                writer.writerows({"name": name, **values} for name, values in summary.items())
+        else:
+            with open(path, "w") as f:
+                json.dump(summary, f, indent=2)
+
+
+profiler = Profiler()
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """times every call in milliseconds under name while the profiler is enabled, otherwise only adds a flag check"""
+    def decorator(func: F) -> F:
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not profiler.enabled:
+                return func(*args, **kwargs)
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.record(name, (time.perf_counter() - start) * 1000)
+        return wrapper  # NOQA
+    return decorator
+
+
+class ProfileOverlay:
+    """live numbers in the top left of the display, refreshed every `every` frames"""
+    def __init__(self, every: int = 15):
+        if not pg.font.get_init():
+            pg.font.init()
+        self.font = pg.font.Font(None, 18)
+        self.every = every
+        self._frame = 0
+        self._text: Optional[pg.Surface] = None
+        self._rect: Optional[pg.Rect] = None
+
+    def _render(self) -> pg.Surface:
+        lines = []
+        for name, values in profiler.summary().items():
+            if "mean" in values:
+                lines.append(f"{name}: {values['mean']:.2f} mean  {values['p99']:.2f} p99")
+        rendered = [self.font.render(line, True, (255, 255, 0)) for line in lines] or [self.font.render("", True, 0)]
+        s = pg.Surface((max(r.get_width() for r in rendered) + 8, sum(r.get_height() for r in rendered) + 8))
+        y = 4
+        for r in rendered:
+            s.blit(r, (4, y))
+            y += r.get_height()
+        return s
+
+    def draw(self, display: pg.Surface, frame: pg.Surface) -> list[pg.Rect]:
+        """
+        :param frame: what is under the overlay, used to clear the previous one
+        :return: the display rects that changed
+        """
+        dirty = []
+        if self._frame % self.every == 0 or self._text is None:
+            self._text = self._render()
+        self._frame += 1
+        if self._rect is not None:
+            display.blit(frame, self._rect, self._rect)
+            dirty.append(self._rect)
+        self._rect = display.blit(self._text, (0, 0))
+        dirty.append(self._rect)
+        return dirty
@@ -0,0 +1,107 @@
+"""
+recording a game so it can be played back exactly, headless and as fast as possible.  a log is
+
+    MAGIC | seed (u64) | config length (u32) | pickled Config | (tick (u32), key (u32)) ...
+
+ending in a record whose key is _END at the tick the game stopped.  randomness comes from the seed, timers from the
+TickClock and paths from a DeferredPool, which hands every result over a fixed number of ticks after it was asked for
+however long the search actually took, so the only input left is the keys
+"""
+from __future__ import annotations
+
+import pickle
+import random
+import struct
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional, BinaryIO
+
+import pygame as pg
+
+from src.models.clock import TickClock
+from src.models.config import *
+from src.models.entity import ImmediatePool
+from src.models.headless import Simulation
+
+__all__ = ("Recorder", "Recording", "read_recording", "DeferredPool", "replay")
+
+MAGIC = b"PACLOG\x01"
+_HEADER = struct.Struct("<QI")
+_EVENT = struct.Struct("<II")
+_END = 0  # pg.K_UNKNOWN, never a real key press
+
+
+class DeferredResult:
+    def __init__(self, result, clock: TickClock, due: int):
+        self.result = result
+        self.clock = clock
+        self.due = due
+
+    def ready(self) -> bool:
+        return self.clock.ticks >= self.due
+
+    def get(self):
+        return self.result.get()  # waits for a search that is running late
+
+
+class DeferredPool:
+    """wraps a pool so its results become ready exactly `delay` ticks after they were asked for"""
+    def __init__(self, pool, clock: TickClock, delay: int):
+        self.pool = pool
+        self.clock = clock
+        self.delay = delay
+
+    def apply_async(self, func, args=()) -> DeferredResult:
+        return DeferredResult(self.pool.apply_async(func, args), self.clock, self.clock.ticks + self.delay)
+
+
+class Recorder:
+    def __init__(self, path: str | Path, seed: int, config: Config):
+        config_bytes = pickle.dumps(config)
+        self._file: BinaryIO = open(path, "wb")
+        self._file.write(MAGIC + _HEADER.pack(seed, len(config_bytes)) + config_bytes)
+
+    def key(self, tick: int, key: int) -> None:
+        self._file.write(_EVENT.pack(tick, key))
+
+    def close(self, tick: int) -> None:
+        self._file.write(_EVENT.pack(tick, _END))
+        self._file.close()
+
+
+@dataclass(slots=True)
+class Recording:
+    seed: int
+    config: Config
+    keys: list[tuple[int, int]]  # (tick, key)
+    end: Optional[int]  # None if the game didn't stop cleanly
+
+
+def read_recording(path: str | Path) -> Recording:
+    data = Path(path).read_bytes()
+    if not data.startswith(MAGIC):
+        raise ValueError(f"{path} is not a recording")
+    seed, length = _HEADER.unpack_from(data, len(MAGIC))
+    start = len(MAGIC) + _HEADER.size
+    config = pickle.loads(data[start:start + length])
+    events = data[start + length:]
+    keys = list(_EVENT.iter_unpack(events[:len(events) - len(events) % _EVENT.size]))
+    end = keys.pop()[0] if keys and keys[-1][1] == _END else None
+    return Recording(seed, config, keys, end)
+
+
+def replay(recording: Recording) -> Simulation:
+    """plays the recording back without a window, sets the global config to the recorded one"""
+    set_global_config(recording.config)
+    random.seed(recording.seed)
+    clock = TickClock(1000 / recording.config.tick_rate)
+    simulation = Simulation(clock=clock, pool=DeferredPool(ImmediatePool(), clock, debug().path_delay_ticks))
+    board = simulation.board
+    for tick, key in recording.keys:
+        while simulation.ticks < tick and not board.is_over:
+            simulation.step()
+        board.on_event(pg.event.Event(pg.KEYDOWN, key=key))
+    last = recording.end if recording.end is not None else max((tick for tick, _ in recording.keys), default=0)
+    while simulation.ticks < last and not board.is_over:
+        simulation.step()
+    return simulation
@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from typing import Optional, TYPE_CHECKING
+
+import pygame as pg
+
+if TYPE_CHECKING:
+    from src.models.board import Board
+    from src.models.entity import SimpleSprite
+
+from src.models.config import *
+from src.models.profiling import profiled
+
+__all__ = ("Renderer", "PickupLayer")
+
+
+class PickupLayer:
+    """
+    the pickups drawn once into cached surfaces, so drawing them all is a blit per surface.  pickups whose rects overlap
+    go on different surfaces, stacked in the order they were given, which keeps the result identical to blitting the
+    sprites one by one.  eating one erases just its rect
+    """
+    def __init__(self, size: tuple[int, int]):
+        self.size = size
+        self.surfaces: list[pg.Surface] = []
+        self.erased: list[pg.Rect] = []  # since the renderer last looked
+        self.is_built = False
+        self._layer_of: dict[int, int] = {}
+
+    def build(self, sprites: list[SimpleSprite]) -> None:
+        self.is_built = True
+        cell = max((max(x.rect.size) for x in sprites), default=1)
+        placed: dict[tuple[int, int], list[SimpleSprite]] = {}
+        self._layer_of = {}
+        for sprite in sprites:
+            r = sprite.rect
+            cells = [(cx, cy) for cx in range(r.left // cell, (r.right - 1) // cell + 1)
+                     for cy in range(r.top // cell, (r.bottom - 1) // cell + 1)]
+            below = [self._layer_of[id(x)] for c in cells for x in placed.get(c, ()) if x.rect.colliderect(r)]
+            self._layer_of[id(sprite)] = max(below, default=-1) + 1
+            for c in cells:
+                placed.setdefault(c, []).append(sprite)
+
+        self.surfaces = [pg.Surface(self.size, flags=pg.SRCALPHA) for _ in range(max(self._layer_of.values(),
+                                                                                        default=-1) + 1)]
+        for surface in self.surfaces:
+            surface.fill((0, 0, 0, 0))
+        for sprite in sprites:
+            # nothing else on the layer overlaps it, so this copies the sprite's pixels as they are
+            self.surfaces[self._layer_of[id(sprite)]].blit(sprite.surface, sprite.pos, special_flags=pg.BLEND_RGBA_MAX)
+
+    def erase(self, sprite: SimpleSprite) -> None:
+        layer = self._layer_of.pop(id(sprite), None)
+        if layer is not None:
+            self.surfaces[layer].fill((0, 0, 0, 0), sprite.rect)
+            self.erased.append(sprite.rect)
+
+    def take_erased(self) -> list[pg.Rect]:
+        erased, self.erased = self.erased, []
+        return erased
+
+    def draw(self, s: pg.Surface, area: Optional[pg.Rect] = None) -> None:
+        for surface in self.surfaces:
+            if area is None:
+                s.blit(surface, (0, 0))
+            else:
+                s.blit(surface, area, area)
+
+
+def _entity_rect(entity) -> pg.Rect:  # padded by a pixel, entities sit on float positions
+    return pg.Rect(int(entity.x) - 1, int(entity.y) - 1, entity.surface.get_width() + 2,
+                   entity.surface.get_height() + 2)
+
+
+def _lines_rect(points: list[Point]) -> Optional[pg.Rect]:
+    if len(points) < 2:
+        return None
+    xs = [int(x) for x, _ in points]
+    ys = [int(y) for _, y in points]
+    return pg.Rect(min(xs) - 1, min(ys) - 1, max(xs) - min(xs) + 3, max(ys) - min(ys) + 3)
+
+
+class Renderer:
+    """
+    keeps the last frame around and only redraws the parts of it that changed since: where entities were and are,
+    erased pickups and the debug ghost paths.  the board is drawn at (0, 0) of the display
+    """
+    def __init__(self, display: pg.Surface, board: Board):
+        self.display = display
+        self.board = board
+        self.frame: Optional[pg.Surface] = None
+        self.background = board.surface.convert()
+        self._entities: dict[int, pg.Rect] = {}
+        self._lines: dict[int, tuple[tuple[Point, ...], Optional[pg.Rect]]] = {}
+
+    def _track(self) -> list[pg.Rect]:
+        """:return: the rects changed since the last call, remembering the current state for the next"""
+        dirty = []
+        for entity in [*self.board.ghosts, self.board.pacman]:
+            rect = _entity_rect(entity)
+            previous = self._entities.get(id(entity))
+            self._entities[id(entity)] = rect
+            if previous is not None and previous.colliderect(rect):
+                dirty.append(previous.union(rect))
+            else:
+                dirty.extend(r for r in (previous, rect) if r is not None)
+
+        if debug().draw_ghost_path:
+            for ghost in self.board.ghosts:
+                moves = tuple(ghost.moves)
+                previous_moves, previous = self._lines.get(id(ghost), ((), None))
+                if moves != previous_moves:
+                    rect = _lines_rect(ghost.moves)
+                    self._lines[id(ghost)] = moves, rect
+                    dirty.extend(r for r in (previous, rect) if r is not None)
+
+        dirty.extend(self.board.pickups.take_erased())
+        return dirty
+
+    def redraw(self, area: pg.Rect) -> None:
+        self.frame.set_clip(area)
+        self.frame.blit(self.background, area, area)
+        self.board.draw(self.frame, area)
+        self.frame.set_clip(None)
+
+    @profiled("renderer.draw")
+    def draw(self) -> list[pg.Rect]:
+        """
+        brings the display up to date with the board
+
+        :return: the display rects that changed, for pg.display.update
+        """
+        if self.frame is None:
+            self.frame = self.board.get_surface()
+            self._track()
+            self.display.fill((255, 255, 255))
+            self.display.blit(self.frame, (0, 0))
+            return [self.display.get_rect()]
+
+        bounds = self.frame.get_rect()
+        dirty = [rect.clip(bounds) for rect in self._track()]
+        dirty = [rect for rect in dirty if rect.w and rect.h]
+        for rect in dirty:
+            self.redraw(rect)
+        for rect in dirty:
+            self.display.blit(self.frame, rect, rect)
+        return dirty
@@ -0,0 +1,59 @@
+from __future__ import annotations
+
+from typing import Generic, TypeVar, Iterable, Iterator, Protocol
+
+import pygame as pg
+
+__all__ = ("SpatialIndex",)
+
+
+class _HasRect(Protocol):
+    rect: pg.Rect
+
+
+T = TypeVar("T", bound=_HasRect)
+
+
+class SpatialIndex(Generic[T]):
+    """
+    items bucketed by the cell their rect's top left falls in.  iterating keeps insertion order, adding and removing
+    are O(1) and near only looks at the few cells a rect can reach
+    """
+    def __init__(self, cell: int, items: Iterable[T] = ()):
+        self.cell = cell
+        self._items: dict[int, T] = {}
+        self._buckets: dict[tuple[int, int], dict[int, T]] = {}
+        self._reach = (1, 1)  # the largest item size, how far back from a rect an overlapping item can start
+        for item in items:
+            self.add(item)
+
+    def _cell(self, x: int, y: int) -> tuple[int, int]:
+        return x // self.cell, y // self.cell
+
+    def add(self, item: T) -> None:
+        self._items[id(item)] = item
+        self._buckets.setdefault(self._cell(item.rect.x, item.rect.y), {})[id(item)] = item
+        self._reach = max(self._reach[0], item.rect.w), max(self._reach[1], item.rect.h)
+
+    def remove(self, item: T) -> None:
+        del self._items[id(item)]
+        bucket = self._buckets[key := self._cell(item.rect.x, item.rect.y)]
+        del bucket[id(item)]
+        if not bucket:
+            del self._buckets[key]
+
+    def near(self, rect: pg.Rect) -> list[T]:
+        """:return: the items whose rects overlap rect"""
+        left, top = self._cell(rect.left - self._reach[0] + 1, rect.top - self._reach[1] + 1)
+        right, bottom = self._cell(rect.right - 1, rect.bottom - 1)
+        return [item for cx in range(left, right + 1) for cy in range(top, bottom + 1)
+                for item in self._buckets.get((cx, cy), {}).values() if item.rect.colliderect(rect)]
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def __iter__(self) -> Iterator[T]:
+        return iter(list(self._items.values()))
+
+    def __contains__(self, item: T) -> bool:
+        return id(item) in self._items
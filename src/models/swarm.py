@@ -0,0 +1,374 @@
+"""
+every ghost's state in numpy arrays, one entry per ghost, so a tick moves all of them in a handful of array operations
+instead of a python call each.  only the ghosts that reached a waypoint, got a path back or have to ask for one are
+handled one at a time.  GhostView is a ghost as the rest of the board sees it, reading and writing its entries
+
+the rules are the ones of AIEntity.update and Board.update, ghosts just all move before any of them collides or asks
+for a path
+
+the arrays only make moving cheap.  500 ghosts all chasing pacman under shared_flow_field take about 1.3 ms a tick, but
+with the shipped goals every other goal is an A* of 20 to 45 ms, and on a change of mode all of them ask at once: over
+600 ticks that's 36 ms a tick on average and 10 s for the first one.  with Config.path_batch_size the ghosts asking for
+the same cell in a tick share one flow field, a breadth first search of about 7 ms.  at 2 the same run averages 19 ms,
+at 1 every request is a field and it's 4 ms with 0.3 s for the first tick.  a field's paths are as short as A*'s but
+may take other turns, so games under it differ from the Ghost objects'
+"""
+from __future__ import annotations
+
+import collections
+import itertools
+import random
+from typing import TYPE_CHECKING, Optional
+
+import numpy as np
+import pygame as pg
+
+if TYPE_CHECKING:
+    from src.models.board import Board
+
+from src.models.assets import sprite_frames, Frame
+from src.models.config import *
+from src.models.entity import ImmediateResult, path_find
+from src.models.goals import GoalFunc
+from src.models.pathfind import FlowField, normalize
+from src.models.pathservice import PathService
+from src.models.profiling import profiled
+
+__all__ = ("GhostSwarm", "GhostView")
+
+_DIRECTIONS: tuple[Direction, ...] = ("none", "up", "down", "left", "right")
+_NONE = 0
+_UNIT = np.array([(0, 0), (0, -1), (0, 1), (-1, 0), (1, 0)], dtype=np.float64)  # indexed by _DIRECTIONS
+
+
+class GhostView:
+    """one ghost of a GhostSwarm, with the attributes of a Ghost the board, the renderer and the goals use"""
+    __slots__ = ("swarm", "index")
+
+    def __init__(self, swarm: GhostSwarm, index: int):
+        self.swarm = swarm
+        self.index = index
+
+    @property
+    def x(self) -> float:
+        return float(self.swarm.x[self.index])
+
+    @x.setter
+    def x(self, value: float):
+        self.swarm.x[self.index] = value
+
+    @property
+    def y(self) -> float:
+        return float(self.swarm.y[self.index])
+
+    @y.setter
+    def y(self, value: float):
+        self.swarm.y[self.index] = value
+
+    @property
+    def pos(self) -> Point:
+        return self.x, self.y
+
+    @pos.setter
+    def pos(self, value: Point):
+        self.x, self.y = value
+
+    @property
+    def start_pos(self) -> Point:
+        return self.swarm.start_pos[self.index]
+
+    @property
+    def direction(self) -> Direction:
+        return _DIRECTIONS[self.swarm.direction[self.index]]
+
+    @property
+    def queued_direction(self) -> Direction:
+        return _DIRECTIONS[self.swarm.queued[self.index]]
+
+    @property
+    def has_moved(self) -> bool:
+        return bool(self.swarm.has_moved[self.index])
+
+    @property
+    def speed(self) -> float:
+        return float(self.swarm.speed[self.index])
+
+    @property
+    def thread(self):
+        return self.swarm.threads[self.index]
+
+    @property
+    def moves(self) -> list[Point]:
+        """the waypoints left, a copy"""
+        return self.swarm.moves[self.index][self.swarm.cursor[self.index]:]
+
+    @property
+    def mask(self) -> pg.mask.Mask:
+        return self.frame.mask
+
+    def rotated(self, angle: int) -> Frame:
+        return sprite_frames(self.swarm.sprites[self.index])[angle]
+
+    @property
+    def frame(self) -> Frame:
+        return self.rotated(0)
+
+    @property
+    def surface(self) -> pg.Surface:
+        return self.frame.surface
+
+    @property
+    def rect(self) -> pg.Rect:
+        return pg.Rect(self.x, self.y, self.surface.get_width(), self.surface.get_height())
+
+    def change(self, direction: Direction) -> None:
+        self.swarm.queued[self.index] = _DIRECTIONS.index(direction)
+
+    def replace(self) -> None:
+        self.pos = self.start_pos
+
+
+class GhostSwarm:
+    def __init__(self, spawns: list[Point], sprites: list[str], goals: list[Goals], speed: float):
+        """the three lists are zipped, one ghost each"""
+        n = len(spawns)
+        self.sprites = sprites
+        self.start_pos = spawns
+        self.chase_goals: list[list[GoalFunc]] = [g.chase for g in goals]
+        self.scatter_goals: list[list[GoalFunc]] = [g.scatter for g in goals]
+
+        self.x = np.array([x for x, _ in spawns], dtype=np.float64)
+        self.y = np.array([y for _, y in spawns], dtype=np.float64)
+        self.speed = np.full(n, speed, dtype=np.float64)
+        self.dx = np.zeros(n)  # the step taken each tick, speed in direction
+        self.dy = np.zeros(n)
+        self.direction = np.zeros(n, dtype=np.int8)  # indexes _DIRECTIONS
+        self.queued = np.zeros(n, dtype=np.int8)
+        self.has_moved = np.zeros(n, dtype=bool)
+        self.stopped_since = np.full(n, -1, dtype=np.int64)
+
+        self.moves: list[list[Point]] = [[] for _ in range(n)]
+        self.cursor = np.zeros(n, dtype=np.int64)  # the next waypoint in moves
+        self.remaining = np.zeros(n, dtype=np.int64)  # len(moves) - cursor
+        self.destination = np.full((n, 2), np.nan)  # the waypoint being walked to, nan before the first
+        self.aggression_length = np.zeros(n, dtype=np.int64)
+        self.threads: list = [None] * n
+
+        # each ghost's index into the stack of walkable grids, one grid per distinct sprite
+        self._sprite_index = {path: i for i, path in enumerate(dict.fromkeys(sprites))}
+        self._grid = np.array([self._sprite_index[path] for path in sprites], dtype=np.intp)
+        self._size = np.array([sprite_frames(path)[0].surface.get_size() for path in self._sprite_index])[self._grid]
+        self._walkable: Optional[np.ndarray] = None
+        self._walkable_for: Optional[Board] = None
+
+        self.views = [GhostView(self, i) for i in range(n)]
+
+    def __len__(self) -> int:
+        return len(self.views)
+
+    @classmethod
+    def from_data(cls, data: BoardData, count: int = 0) -> GhostSwarm:
+        """
+        like Ghost.ghosts_from_data
+
+        :param count: how many ghosts, sprites goals and spawns are repeated when there are fewer of them.  0 is one
+        ghost per configured sprite
+        """
+        c = global_config()
+        spawns = data.ghost_spawn_locations.copy()
+        random.shuffle(spawns)
+        count = count or min(len(c.board.ghosts()), len(c.ghost_goals), len(spawns))
+        sprites, goals, spawns = (list(itertools.islice(itertools.cycle(x), count))
+                                  for x in (c.board.ghosts(), c.ghost_goals, spawns))
+        return cls(spawns, sprites, goals, c.ghost_speed)
+
+    def walkable(self, board: Board) -> np.ndarray:
+        """[sprite][x][y] board.walkable for every sprite, padded with False to the largest"""
+        if self._walkable is None or self._walkable_for is not board:
+            grids = [board.walkable(sprite_frames(path)[0].mask, True) for path in self._sprite_index]
+            stack = np.zeros((len(grids), max(g.shape[0] for g in grids), max(g.shape[1] for g in grids)), dtype=bool)
+            for i, grid in enumerate(grids):
+                stack[i, :grid.shape[0], :grid.shape[1]] = grid
+            self._walkable, self._walkable_for = stack, board
+        return self._walkable
+
+    def _steer(self, which: np.ndarray, direction: np.ndarray) -> None:
+        """change_direction for the ghosts in which"""
+        self.direction[which] = direction
+        self.dx[which] = self.speed[which] * _UNIT[direction, 0]
+        self.dy[which] = self.speed[which] * _UNIT[direction, 1]
+
+    def _advance(self, which: np.ndarray, walkable: np.ndarray) -> np.ndarray:
+        """
+        Entity.advance_if_able for the ghosts in which
+
+        :return: for each of them, true if the full step was taken
+        """
+        def fits(x: np.ndarray, y: np.ndarray) -> np.ndarray:
+            x, y = np.round(x).astype(np.intp), np.round(y).astype(np.intp)
+            inside = (0 <= x) & (x < walkable.shape[1]) & (0 <= y) & (y < walkable.shape[2])
+            return inside & walkable[self._grid[which], np.where(inside, x, 0), np.where(inside, y, 0)]
+
+        x, y = self.x[which], self.y[which]
+        full_x, full_y = x + self.dx[which], y + self.dy[which]
+        full = fits(full_x, full_y)
+        unit = _UNIT[self.direction[which]]
+        speed = self.speed[which]
+        pixels = np.zeros(len(which))  # of the step there was room for, when not all of it
+        going = ~full
+        for k in range(1, int(np.ceil(speed.max(initial=0)))):
+            going &= (k < speed) & fits(x + unit[:, 0] * k, y + unit[:, 1] * k)
+            if not going.any():
+                break
+            pixels[going] = k
+        self.x[which] = np.where(full, full_x, x + unit[:, 0] * pixels)
+        self.y[which] = np.where(full, full_y, y + unit[:, 1] * pixels)
+        return full
+
+    def move(self, board: Board) -> None:
+        """Entity.update for every ghost"""
+        walkable = self.walkable(board)
+        queued = np.flatnonzero(self.queued != _NONE)
+        still = np.flatnonzero(self.queued == _NONE)
+        self.has_moved[:] = False
+
+        previous = self.direction[queued]
+        self._steer(queued, self.queued[queued])
+        turned = self._advance(queued, walkable)
+        failed = queued[~turned]
+        self._steer(failed, previous[~turned])
+        self._advance(failed, walkable)
+        self.queued[queued[turned]] = _NONE
+        self.has_moved[queued[turned]] = True
+
+        self.has_moved[still] = self._advance(still, walkable)
+        self.stopped_since[self.has_moved] = -1
+        self.stopped_since[~self.has_moved & (self.stopped_since == -1)] = board.clock()
+
+    def _move_to(self, i: int, point: Point) -> None:
+        x, y = point
+        gx, gy = self.x[i], self.y[i]
+        if gx == x and gy == y:
+            if self.remaining[i]:
+                self._advance_goal(i)
+        else:
+            lst = [gy - y, y - gy, gx - x, x - gx]  # up down left right
+            mx = max(lst)
+            if lst.count(mx) >= 2 and self.remaining[i] >= 3:
+                self._move_to(i, self.moves[i][self.cursor[i] + random.randint(1, 2)])
+                return
+            self.queued[i] = lst.index(mx) + 1
+
+    def _advance_goal(self, i: int) -> None:
+        if self.remaining[i]:
+            self.destination[i] = destination = self.moves[i][self.cursor[i]]
+            self.cursor[i] += 1
+            self.remaining[i] -= 1
+            self._move_to(i, destination)
+
+    def _set_moves(self, i: int, moves: list[Point]) -> None:
+        self.moves[i] = moves
+        self.cursor[i] = 0
+        self.remaining[i] = len(moves)
+
+    def _poll(self) -> None:
+        for i, thread in enumerate(self.threads):
+            if thread is not None and thread.ready():
+                self._set_moves(i, thread.get())
+                self.threads[i] = None
+                self.aggression_length[i] = self.remaining[i]
+
+    def _waiting(self) -> np.ndarray:
+        return np.fromiter((t is not None for t in self.threads), dtype=bool, count=len(self.threads))
+
+    def _path_find_to(self, board: Board, i: int, point: Point, field: Optional[FlowField] = None) -> None:
+        """AIEntity.path_find_to, walking field instead of searching when one towards point is given"""
+        pos = self.views[i].pos
+        if field is not None:
+            self.threads[i] = ImmediateResult(field.path(pos))
+        elif global_config().shared_flow_field and normalize(point) == normalize(board.pacman.pos):
+            self.threads[i] = ImmediateResult(board.flow_field().path(pos))
+        elif isinstance(board.pool, PathService):
+            self.threads[i] = board.pool.request(self.views[i], pos, point, priority=int(self.remaining[i]))
+        else:
+            self.threads[i] = board.pool.apply_async(path_find, (board.data.boundary, pos, point))
+        self.queued[i] = _NONE
+        self._set_moves(i, [])
+
+    @staticmethod
+    def _shared_cells(board: Board, points: list[Point]) -> set[Point]:
+        """the cells at least Config.path_batch_size of points are in, each searched once as a flow field"""
+        c = global_config()
+        if not c.path_batch_size:
+            return set()
+        counts = collections.Counter(normalize(point) for point in points)
+        if c.shared_flow_field:
+            counts.pop(normalize(board.pacman.pos), None)  # board.flow_field is kept up anyway
+        return {cell for cell, count in counts.items() if count >= c.path_batch_size}
+
+    @profiled("swarm.update")
+    def update(self, board: Board, start_scatter: bool, start_chase: bool) -> None:
+        """the ghost half of Board.update"""
+        c = global_config()
+        last_x, last_y = self.x.copy(), self.y.copy()
+        self.move(board)
+        self._poll()
+
+        unset = (self.remaining > 0) & np.isnan(self.destination[:, 0])
+        self.destination[unset, 0], self.destination[unset, 1] = self.x[unset], self.y[unset]
+        # nan is never near
+        distance = np.abs(self.destination[:, 0] - self.x) + np.abs(self.destination[:, 1] - self.y)
+        waiting = self._waiting()
+        # the waypoint is reached or too far off, and separately nothing moved
+        first = (distance <= c.grid_size) | ~(distance <= c.re_pathfind_distance)
+        second = (last_x == self.x) & (last_y == self.y) & ~waiting
+        for i in np.flatnonzero((first | second) & (self.remaining > 0)):
+            if first[i]:
+                self._advance_goal(i)
+            if second[i]:
+                self._advance_goal(i)
+
+        pacman = board.pacman.rect
+        left, top = np.trunc(self.x), np.trunc(self.y)  # as pg.Rect takes floats
+        collides = ((left < pacman.right) & (pacman.left < left + self._size[:, 0])
+                    & (top < pacman.bottom) & (pacman.top < top + self._size[:, 1]))
+        if collides.any():
+            if board.mode == "scatter":
+                self.x[collides] = [self.start_pos[i][0] for i in np.flatnonzero(collides)]
+                self.y[collides] = [self.start_pos[i][1] for i in np.flatnonzero(collides)]
+            else:
+                board.is_over = True
+
+        aggression = c.ghost_aggression
+        can_path = ~waiting & ((self.remaining == 0)
+                               | (self.remaining <= aggression) & (aggression < self.aggression_length))
+        if board.lod is not None:
+            chosen = board.lod.select(board, self.x, self.y, can_path, self.remaining, start_scatter or start_chase,
+                                      collides & (board.mode == "scatter"))
+            scatter = np.full(len(self), board.mode == "scatter")
+        else:
+            scatter = can_path & (board.mode == "scatter") | start_scatter
+            chase = ~scatter & (can_path | start_chase)
+            if board.mode == "scatter":
+                scatter &= ~collides  # sent back to the start instead
+            chosen = np.flatnonzero(scatter | chase)
+
+        def goal(i: int) -> Point:
+            return random.choice(self.scatter_goals[i] if scatter[i] else self.chase_goals[i])(board)
+
+        # goals are only picked for the ghosts that ask, unless they have to be grouped first
+        points = {i: goal(i) for i in chosen.tolist()} if c.path_batch_size else {}
+        shared = self._shared_cells(board, list(points.values()))
+        fields: dict[Point, FlowField] = {}  # searched when the first ghost asks, so the lod budget counts them
+
+        def ask(i: int) -> None:
+            point = points[i] if points else goal(i)
+            if (cell := normalize(point)) in shared and cell not in fields:
+                fields[cell] = FlowField(board.data.boundary, cell)
+            self._path_find_to(board, i, point, fields.get(cell))
+
+        if board.lod is not None:
+            board.lod.dispatch(chosen, ask, board.data.boundary)
+        else:
+            for i in chosen.tolist():
+                ask(i)
@@ -0,0 +1,102 @@
+from __future__ import annotations
+
+import csv
+import dataclasses
+import itertools
+import multiprocessing
+import random
+from pathlib import Path
+from typing import Iterable, Optional, Any
+
+from src.models.board import load_board_data
+from src.models.compiled import board_key
+from src.models.config import *
+from src.models.entity import ImmediatePool
+from src.models.headless import Simulation, Controller, wander
+
+__all__ = ("GameResult", "config_grid", "run_tournament", "write_csv")
+
+
+@dataclasses.dataclass(slots=True)
+class GameResult:
+    variant: int  # index into the configs given to run_tournament
+    seed: int
+    ticks_survived: int
+    caught: bool
+    points_eaten: int
+    pathfind_calls: int
+    mean_pathfind_ms: float
+
+
+def config_grid(base: Config, **options: list[Any]) -> list[Config]:
+    """every combination of the options applied to base, e.g. config_grid(c, ghost_aggression=[5, 10])"""
+    names = list(options)
+    return [dataclasses.replace(base, **dict(zip(names, values))) for values in itertools.product(*options.values())]
+
+
+# per worker process state, set up once by _init_worker
+_configs: list[Config] = []
+_boards: dict[tuple, BoardData] = {}
+_controller: Optional[Controller] = None
+
+
+def _init_worker(configs: list[Config], controller: Optional[Controller]) -> None:
+    global _configs, _controller
+    _configs = configs
+    _controller = controller
+
+
+def _board_data(information_path: str) -> BoardData:
+    # the board depends on what board_key hashes and load_board_data attaches the configured searches to its grid, so
+    # configs that agree on both share the loaded board
+    c = global_config()
+    key = (board_key(information_path), c.precompute_paths, c.path_cache_size, c.path_cluster_size,
+           c.path_refine_segments, c.contract_corridors)
+    if key not in _boards:
+        _boards[key] = load_board_data()
+    return _boards[key]
+
+
+def _play(task: tuple[int, int, int]) -> GameResult:
+    variant, seed, max_ticks = task
+    config = _configs[variant]
+    set_global_config(config)
+    data = _board_data(config.board.information_path)
+
+    random.seed(seed)
+    pool = ImmediatePool()
+    simulation = Simulation(data, pool=pool, controller=_controller)
+    ticks = simulation.run(max_ticks)
+    return GameResult(
+        variant=variant,
+        seed=seed,
+        ticks_survived=ticks,
+        caught=simulation.board.is_over,
+        points_eaten=len(data.points_points) - len(simulation.board.points),
+        pathfind_calls=pool.calls,
+        mean_pathfind_ms=pool.seconds / pool.calls * 1000 if pool.calls else 0.,
+    )
+
+
+def run_tournament(configs: list[Config], seeds: Iterable[int], max_ticks: int, processes: Optional[int] = None,
+                   controller: Optional[Controller] = wander) -> list[GameResult]:
+    """
+    plays every config against every seed in headless games spread over a process pool
+
+    :param configs: the variants, they (including their goal functions) have to be picklable
+    :param max_ticks: a game that is still running after this many ticks ends with caught False
+    :param processes: defaults to every core
+    :param controller: steers pacman, a module level function so it can be sent to the workers
+    :return: one row per game, ordered by variant then seed
+    """
+    tasks = [(variant, seed, max_ticks) for variant in range(len(configs)) for seed in seeds]
+    with multiprocessing.Pool(processes, initializer=_init_worker, initargs=(configs, controller)) as pool:
+        results = list(pool.imap_unordered(_play, tasks))
+    return sorted(results, key=lambda r: (r.variant, r.seed))
+
+
+def write_csv(results: list[GameResult], path: str | Path) -> None:
+    with open(path, "w", newline="") as f:
+        writer = csv.DictWriter(f, fieldnames=[field.name for field in dataclasses.fields(GameResult)])
+        writer.writeheader()
+        writer.writerows(dataclasses.asdict(result) for result in results)
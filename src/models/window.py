@@ -1,30 +1,84 @@
 from __future__ import annotations
 
+import random
+import time
+from typing import Optional
+
 import pygame as pg
 
+from src.models.assets import preload
 from src.models.config import *
 from src.models.board import Board
+from src.models.clock import TickClock
+from src.models.entity import get_pool
+from src.models.profiling import profiler, profiled, ProfileOverlay
+from src.models.recording import Recorder, DeferredPool
+from src.models.renderer import Renderer
 
 
 class Window:
     def __init__(self):
         self.display = pg.display.set_mode(global_config().screen_dimensions)
         pg.display.set_caption(global_config().window_name)
-        self.board = Board()
-        self.clock = pg.time.Clock()
+        preload(global_config().board.sprites())  # converted to the display's format, so after set_mode
+        profiler.enabled = debug().profile
+        self.clock = TickClock(1000 / global_config().tick_rate)  # every timer on the board reads this
+        self.recorder: Optional[Recorder] = None
+        pool = None
+        if debug().record is not None:
+            seed = random.randrange(2 ** 63)
+            random.seed(seed)
+            self.recorder = Recorder(debug().record, seed, global_config())
+            pool = DeferredPool(get_pool(), self.clock, debug().path_delay_ticks)
+        self.board = Board(clock=self.clock, pool=pool)
+        self.renderer = Renderer(self.display, self.board)
+        self.overlay = ProfileOverlay() if debug().profile else None
 
     def run(self):
+        """
+        updates the board at a fixed tick_rate against real time and draws in between.  when drawing falls behind,
+        frames are skipped and the missed updates are run back to back, up to max_catch_up_ticks at a time
+        """
+        c = global_config()
+        tick = 1 / c.tick_rate
+        frame = 1 / c.render_rate if c.render_rate else 0.
+        accumulator = 0.
+        previous = next_frame = time.perf_counter()
         is_running = True
-        while is_running:
-            for event in pg.event.get():
-                if event.type == pg.QUIT:
-                    is_running = False
-                self.board.on_event(event)
-            self.board.update()
-            self.draw()
-            self.clock.tick(60)
+        try:
+            while is_running and not self.board.is_over:
+                now = time.perf_counter()
+                accumulator = min(accumulator + now - previous, tick * c.max_catch_up_ticks)
+                previous = now
+                for event in pg.event.get():
+                    if event.type == pg.QUIT:
+                        is_running = False
+                    elif event.type == pg.KEYDOWN and self.recorder is not None:
+                        self.recorder.key(self.clock.ticks, event.key)
+                    self.board.on_event(event)
+
+                updated = False
+                while accumulator >= tick and not self.board.is_over:
+                    self.board.update()
+                    self.clock.tick()
+                    accumulator -= tick
+                    updated = True
+                if updated and now >= next_frame:
+                    self.draw()
+                    next_frame = max(next_frame + frame, now)
+                if profiler.enabled and updated:
+                    profiler.record("frame", (time.perf_counter() - now) * 1000)  # without the wait below
+                time.sleep(max(0., tick - accumulator - (time.perf_counter() - now)))
+        finally:
+            self.board.close()
+            if self.recorder is not None:
+                self.recorder.close(self.clock.ticks)
+            if debug().profile_export is not None:
+                profiler.export(debug().profile_export)
 
+    @profiled("window.draw")
     def draw(self):
-        self.display.fill((255, 255, 255))
-        self.display.blit(self.board.get_surface(), (0, 0))
-        pg.display.flip()
+        dirty = self.renderer.draw()
+        if self.overlay is not None:
+            dirty.extend(self.overlay.draw(self.display, self.renderer.frame))
+        pg.display.update(dirty)
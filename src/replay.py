@@ -0,0 +1,42 @@
+"""
+plays back a game recorded with Debug.record, headless and as fast as the cpu allows:
+
+    python -m src.replay game.log
+    python -m src.replay game.log --profile timings.json
+
+the same log gives the same game on every build, so the timings of two builds can be compared directly
+"""
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+from typing import Optional
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+from src.models.profiling import profiler
+from src.models.recording import read_recording, replay
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("log")
+    parser.add_argument("--profile", help="where the profiler's timings are written, .json or .csv")
+    args = parser.parse_args(argv)
+
+    recording = read_recording(args.log)
+    profiler.enabled = args.profile is not None
+    start = time.perf_counter()
+    simulation = replay(recording)
+    seconds = time.perf_counter() - start
+    if args.profile:
+        profiler.export(args.profile)
+    print(f"{simulation.ticks} ticks in {seconds:.2f}s, caught: {simulation.board.is_over}, "
+          f"pacman at {simulation.board.pacman.pos}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,39 @@
+import dataclasses
+import os
+import random
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+
+import pytest
+
+from src.main import default_config
+from src.models.board import load_board_data
+from src.models.config import *
+
+set_global_config(dataclasses.replace(default_config(), debug=Debug()))  # for module and session fixtures
+
+
+@pytest.fixture(autouse=True)
+def config():
+    """the shipped config without the debug drawing, put back after every test"""
+    set_global_config(dataclasses.replace(default_config(), debug=Debug()))
+    random.seed(0)
+    yield global_config()
+    set_global_config(dataclasses.replace(default_config(), debug=Debug()))
+
+
+@pytest.fixture(scope="session")
+def data() -> BoardData:
+    """the shipped board, loaded once.  tests must not attach anything to its grid"""
+    return load_board_data()
+
+
+def vertex_pairs(grid, count: int, seed: int = 0) -> list[tuple[Point, Point]]:
+    rng = random.Random(seed)
+    vertices = list(grid._vertices)  # NOQA
+    return [(rng.choice(vertices), rng.choice(vertices)) for _ in range(count)]
+
+
+def is_walk(grid, path: list[Point]) -> bool:
+    """every step of path is an edge of grid"""
+    return all(b in grid._vertices[a].valid_vertices for a, b in zip(path, path[1:]))  # NOQA
@@ -0,0 +1,67 @@
+import json
+import struct
+
+import pygame as pg
+import pytest
+
+from src.models.atlas import MAGIC, build_atlas, load_atlas, read_atlas
+
+
+@pytest.fixture
+def root(tmp_path):
+    root = tmp_path / "assets"
+    (root / "ghosts").mkdir(parents=True)
+    for name, size, color in (("a.png", (12, 8), (255, 0, 0, 255)), ("ghosts/b.png", (5, 9), (0, 255, 0, 128))):
+        surface = pg.Surface(size, flags=pg.SRCALPHA)
+        surface.fill(color)
+        pg.image.save(surface, str(root / name))
+    return root
+
+
+def header_and_png(data: bytes) -> tuple[dict, bytes]:
+    length, = struct.unpack_from("<I", data, len(MAGIC))
+    start = len(MAGIC) + 4
+    return json.loads(data[start:start + length]), data[start + length:]
+
+
+def with_header(header: dict, png: bytes) -> bytes:
+    encoded = json.dumps(header).encode()
+    return MAGIC + struct.pack("<I", len(encoded)) + encoded + png
+
+
+def test_images_round_trip(root, tmp_path):
+    build_atlas(root, tmp_path / "sprites.atlas")
+    atlas = read_atlas(tmp_path / "sprites.atlas")
+    for name in ("a.png", "ghosts/b.png"):
+        source = pg.image.load(str(root / name))
+        packed = atlas.get(name)
+        assert packed.get_size() == source.get_size()
+        assert pg.image.tobytes(packed, "RGBA") == pg.image.tobytes(source, "RGBA")
+    assert atlas.names("ghosts") == ["ghosts/b.png"]
+
+
+def damaged(data: bytes) -> dict[str, bytes]:
+    header, png = header_and_png(data)
+    start = len(MAGIC) + 4
+    return {
+        "truncated header": data[:start + 3],
+        "short length": data[:len(MAGIC) + 2],
+        "bad json": MAGIC + struct.pack("<I", 5) + b"{nope" + png,
+        "no rects": with_header({"key": header["key"]}, png),
+        "bad rect": with_header({**header, "rects": {"a.png": "x"}}, png),
+        "rect off the image": with_header({**header, "rects": {"a.png": [5000, 0, 4, 4]}}, png),
+        "bad png": with_header(header, png[:40]),
+    }
+
+
+@pytest.mark.parametrize("damage", ["truncated header", "short length", "bad json", "no rects", "bad rect",
+                                    "rect off the image", "bad png"])
+def test_damaged_atlas_is_packed_again(root, tmp_path, damage):
+    path = tmp_path / "sprites.atlas"
+    key = build_atlas(root, path).key
+    path.write_bytes(damaged(path.read_bytes())[damage])
+    assert read_atlas(path, key) is None
+
+    atlas = load_atlas(root, path)
+    assert atlas.key == key and atlas.get("a.png").get_size() == (12, 8)
+    assert read_atlas(path, key) is not None
@@ -0,0 +1,74 @@
+import random
+
+import numpy as np
+import pygame as pg
+import pytest
+
+from src.models.board import Board
+from src.models.entity import ImmediatePool
+
+
+@pytest.fixture
+def board(data) -> Board:
+    return Board(data, clock=lambda: 0, pool=ImmediatePool())
+
+
+def test_collides_with_wall_takes_float_positions(board):
+    mask = board.pacman.mask
+    width, height = board.walkable(mask).shape
+    for x, y in [(0, 0), (width - 1, height - 1), *board.data.pacman_spawn_locations[:5]]:
+        for dx, dy in [(.4, 0), (0, .4), (-.4, -.4)]:
+            assert board.collides_with_wall(mask, (x + dx, y + dy)) == board.collides_with_wall(mask, (x, y))
+    assert board.collides_with_wall(mask, (width - .4, 0))  # rounds off the board
+
+
+def test_pacman_moves_with_the_mask_it_faces(board):
+    pacman = board.pacman
+    for direction in ("up", "left", "down", "right"):
+        pacman.change_direction(direction)
+        assert pacman.collision_mask is pacman.rotated({"up": 90, "left": 180, "down": -90, "right": 0}[direction]).mask
+        pacman.advance_if_able(board)
+        assert not board.collides_with_wall(pacman.collision_mask, pacman.pos)
+    assert len(board._walkable) >= 4  # NOQA
+
+
+def test_pacman_never_ends_up_in_a_wall(board):
+    keys = (pg.K_a, pg.K_w, pg.K_d, pg.K_s)
+    for tick in range(600):
+        if tick % 20 == 0:
+            board.on_event(pg.event.Event(pg.KEYDOWN, key=keys[tick // 20 % 4]))
+        board.pacman.update(board)
+        assert not board.collides_with_wall(board.pacman.collision_mask, board.pacman.pos)
+
+
+def room(walkable: np.ndarray, x: int, y: int, dx: int, dy: int) -> int:
+    """whole pixels from x, y towards dx, dy before the mask would touch a wall"""
+    width, height = walkable.shape
+    pixels = 0
+    while True:
+        nx, ny = x + dx * (pixels + 1), y + dy * (pixels + 1)
+        if not (0 <= nx < width and 0 <= ny < height and walkable[nx, ny]):
+            return pixels
+        pixels += 1
+
+
+@pytest.mark.parametrize("speed", [3, 7])
+def test_pacman_goes_right_up_to_the_wall(board, speed):
+    pacman = board.pacman
+    pacman.change_direction("right")
+    walkable = board.walkable(pacman.collision_mask)
+    rng = random.Random(0)
+    spots = np.argwhere(walkable).tolist()
+    while True:  # somewhere the last full step doesn't fit and what's left of the gap is more than a pixel
+        x, y = rng.choice(spots)
+        if (gap := room(walkable, x, y, 1, 0)) > speed and gap % speed >= 2:
+            break
+
+    pacman.pos = x, y
+    pacman.change_speed(speed)
+    steps = 0
+    while pacman.advance_if_able(board):
+        steps += 1
+    assert steps == gap // speed
+    assert pacman.pos == (x + gap, y)
+    assert not pacman.advance_if_able(board) and pacman.pos == (x + gap, y)
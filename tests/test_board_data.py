@@ -0,0 +1,71 @@
+import numpy as np
+import pygame as pg
+
+from src.models.assets import fetch_surface, array_from_mask
+from src.models.config import *
+from src.models.pathfind import boundary_matrix
+
+
+def reference_parse(surface: pg.Surface) -> dict:
+    """the get_at parser BoardData.from_surface replaced, drawing its points on a copy of surface"""
+    surface = surface.copy()
+    grid_size = global_config().grid_size
+    board = global_config().board
+    boundary = [[1 for _ in range(surface.get_width())] for __ in range(surface.get_height())]
+    pacman_mask = pg.Surface(surface.get_size(), flags=pg.SRCALPHA)
+    ghost_mask = pg.Surface(surface.get_size(), flags=pg.SRCALPHA)
+    pacman_mask.fill((0, 0, 0, 0))
+    ghost_mask.fill((0, 0, 0, 0))
+    color_map: dict[Color, list[Point]] = {board.pacman_spawn_color: [], board.ghost_spawn_color: [],
+                                           board.scatter_color: []}
+
+    for x in range(surface.get_width()):
+        for y in range(surface.get_height()):
+            color = tuple(surface.get_at((x, y)))[:3]
+            if not (y % grid_size == 0 or x % grid_size == 0):
+                boundary[y][x] = -1
+            if color in color_map:
+                color_map[color].append((x, y))
+            elif color == board.wall_color:
+                pacman_mask.set_at((x, y), color)
+                ghost_mask.set_at((x, y), color)
+                boundary[y][x] = False
+            elif color == board.pacman_wall_color:
+                pacman_mask.set_at((x, y), color)
+
+    points = []
+    w, h = fetch_surface(board.point_path).get_size()
+    w -= 1
+    h -= 1
+    for y in range(surface.get_height() // grid_size):
+        for x in range(surface.get_width() // grid_size):
+            realx, realy = x * grid_size, y * grid_size
+            if all(realx + w < surface.get_width() and realy + h < surface.get_height()
+                   and surface.get_at((posx, posy)) == (0, 0, 0, 0)
+                   for posx, posy in ((realx, realy), (realx + w, realy), (realx + w, realy + h), (realx, realy + h))):
+                points.append((realx, realy))
+                pg.draw.rect(surface, (1, 1, 1, 1), (realx, realy, w, h))
+
+    return {
+        "ghost_spawn_locations": color_map[board.ghost_spawn_color],
+        "pacman_spawn_locations": color_map[board.pacman_spawn_color],
+        "scatter_points": color_map[board.scatter_color],
+        "points_points": points,
+        "pacman_mask": array_from_mask(pg.mask.from_surface(pacman_mask, 1)),
+        "ghost_mask": array_from_mask(pg.mask.from_surface(ghost_mask, 1)),
+        "boundary": np.array(boundary),
+    }
+
+
+def test_from_surface_matches_the_get_at_parser(config):
+    surface = fetch_surface(config.board.information_path)
+    before = pg.surfarray.array3d(surface).copy()
+    data = BoardData.from_surface(surface)
+    assert (pg.surfarray.array3d(surface) == before).all()  # nothing is drawn on the cached asset
+
+    reference = reference_parse(surface)
+    for name in ("ghost_spawn_locations", "pacman_spawn_locations", "scatter_points", "points_points"):
+        assert getattr(data, name) and getattr(data, name) == reference[name], name
+    assert (array_from_mask(data.pacman_mask) == reference["pacman_mask"]).all()
+    assert (array_from_mask(data.ghost_mask) == reference["ghost_mask"]).all()
+    assert (boundary_matrix(array_from_mask(data.ghost_mask), config.grid_size) == reference["boundary"]).all()
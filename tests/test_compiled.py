@@ -0,0 +1,69 @@
+import json
+import struct
+
+import numpy as np
+import pytest
+
+from src.models.assets import fetch_surface, array_from_mask
+import src.models.compiled as compiled
+from src.models.compiled import MAGIC, board_key, read_compiled, write_compiled
+from src.models.config import *
+
+
+def test_compiled_board_matches_a_fresh_parse(tmp_path):
+    information_path = global_config().board.information_path
+    parsed = BoardData.from_surface(fetch_surface(information_path))
+    path = tmp_path / "information.board"
+    key = board_key(information_path)
+    write_compiled(path, key, parsed)
+    loaded = read_compiled(path, key)
+
+    for field in ("ghost_spawn_locations", "pacman_spawn_locations", "scatter_points", "points_points"):
+        assert getattr(loaded, field) == getattr(parsed, field)
+    for mask in ("pacman_mask", "ghost_mask"):
+        assert np.array_equal(array_from_mask(getattr(loaded, mask)), array_from_mask(getattr(parsed, mask)))
+    assert loaded.boundary._vertices == parsed.boundary._vertices  # NOQA
+    assert loaded.boundary.grid_size == parsed.boundary.grid_size
+
+
+def test_compiled_board_ignored_for_another_key(tmp_path, data):
+    path = tmp_path / "information.board"
+    write_compiled(path, "old", data)
+    assert read_compiled(path, "new") is None
+    assert read_compiled(tmp_path / "missing.board", "old") is None
+
+
+def damaged(data: bytes) -> dict[str, bytes]:
+    start = len(MAGIC) + 4
+    length, = struct.unpack_from("<I", data, len(MAGIC))
+    header = json.loads(data[start:start + length])
+    del header["arrays"]["vertices"]
+    encoded = json.dumps(header).encode().ljust(length)
+    return {
+        "truncated arrays": data[:len(data) // 2],
+        "truncated header": data[:start + length // 2],
+        "short length": data[:len(MAGIC) + 2],
+        "bad json": data[:start] + b"{" * length + data[start + length:],
+        "missing array": data[:len(MAGIC)] + struct.pack("<I", length) + encoded + data[start + length:],
+    }
+
+
+@pytest.mark.parametrize("damage", ["truncated arrays", "truncated header", "short length", "bad json",
+                                    "missing array"])
+def test_damaged_board_is_compiled_again(tmp_path, data, damage):
+    path = tmp_path / "information.board"
+    write_compiled(path, "key", data)
+    path.write_bytes(damaged(path.read_bytes())[damage])
+    assert read_compiled(path, "key") is None
+
+
+def test_truncated_board_falls_back_to_the_image(tmp_path, monkeypatch, data):
+    information_path = global_config().board.information_path
+    path = tmp_path / "information.board"
+    write_compiled(path, board_key(information_path), data)
+    path.write_bytes(path.read_bytes()[:200])
+    monkeypatch.setattr(compiled, "compiled_path", lambda _: path)
+
+    loaded = compiled.compiled_board_data(information_path)
+    assert loaded.points_points == data.points_points
+    assert read_compiled(path, board_key(information_path)) is not None  # and written again
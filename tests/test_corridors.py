@@ -0,0 +1,57 @@
+import dataclasses
+
+import pytest
+
+from src.models.config import *
+from src.models.corridors import CorridorGraph
+from src.models.maze import generate_maze
+from src.models.pathfind import SortingPath
+
+from tests.conftest import vertex_pairs, is_walk
+from tests.test_pathfind import sink_pairs
+
+
+@pytest.fixture(scope="module")
+def lane_grid():
+    """a maze on a 20px grid, where corridors are one lane wide and actually contract"""
+    set_global_config(dataclasses.replace(global_config(), grid_size=20))
+    try:
+        return BoardData.from_surface(generate_maze((600, 600), seed=11).information).boundary
+    finally:
+        set_global_config(dataclasses.replace(global_config(), grid_size=10))
+
+
+def check(grid, corridors, pairs):
+    for start, goal in pairs:
+        path = corridors.get_path(start, goal)
+        assert len(path) == len(grid._a_star(start, goal, SortingPath.CLOSEST))  # NOQA
+        if path:
+            assert path[0] == start and path[-1] == goal and is_walk(grid, path)
+
+
+def nearby_pairs(grid, count: int) -> list[tuple[Point, Point]]:
+    """pairs a few vertices apart, which often share a corridor and take the direct edges"""
+    vertices = list(grid._vertices)  # NOQA
+    return list(zip(vertices, vertices[3:]))[:count]
+
+
+def test_contracted_paths_as_short_as_a_star(data):
+    grid = data.boundary
+    corridors = CorridorGraph(grid)
+    assert corridors.node_count < len(grid._vertices) / 2  # NOQA the board's corridors are two lanes wide
+    check(grid, corridors, vertex_pairs(grid, 30, seed=12) + nearby_pairs(grid, 30) + sink_pairs(grid, 10))
+
+
+def test_two_lane_corridors_of_a_maze_contract():
+    grid = BoardData.from_surface(generate_maze((600, 600), seed=11).information).boundary
+    corridors = CorridorGraph(grid)
+    assert corridors.node_count < len(grid._vertices) / 2  # NOQA
+    check(grid, corridors, vertex_pairs(grid, 30, seed=14) + nearby_pairs(grid, 30) + sink_pairs(grid, 10))
+
+
+def test_contracted_paths_on_one_lane_corridors(lane_grid, config):
+    set_global_config(dataclasses.replace(config, grid_size=20))
+    corridors = CorridorGraph(lane_grid)
+    assert corridors.node_count < len(lane_grid._vertices) / 2  # NOQA
+    check(lane_grid, corridors, vertex_pairs(lane_grid, 40, seed=13) + nearby_pairs(lane_grid, 40)
+          + sink_pairs(lane_grid, 10))
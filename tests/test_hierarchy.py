@@ -0,0 +1,36 @@
+import pytest
+
+from src.models.config import *
+from src.models.hierarchy import Hierarchy
+from src.models.maze import generate_maze
+from src.models.pathfind import SortingPath
+
+from tests.conftest import vertex_pairs, is_walk
+from tests.test_pathfind import sink_pairs
+
+
+@pytest.fixture(scope="module")
+def maze_grid():
+    return BoardData.from_surface(generate_maze((400, 400), seed=9).information).boundary
+
+
+@pytest.mark.parametrize("board", ["shipped", "maze"])
+@pytest.mark.parametrize("cluster", [8, 16])
+def test_hierarchical_paths_as_short_as_a_star(data, maze_grid, board, cluster):
+    grid = data.boundary if board == "shipped" else maze_grid
+    hierarchy = Hierarchy(grid, cluster)
+    for start, goal in vertex_pairs(grid, 25, seed=cluster) + sink_pairs(grid, 5):
+        path = hierarchy.get_path(start, goal)
+        assert len(path) == len(grid._a_star(start, goal, SortingPath.CLOSEST))  # NOQA
+        if path:
+            assert path[0] == start and path[-1] == goal and is_walk(grid, path)
+
+
+def test_refined_paths_start_the_same_way(data):
+    grid = data.boundary
+    full, refined = Hierarchy(grid, 8), Hierarchy(grid, 8, refine=1)
+    for start, goal in vertex_pairs(grid, 25, seed=10):
+        head = refined.get_path(start, goal)
+        assert head == full.get_path(start, goal)[:len(head)]
+        if len(head) > 1:
+            assert is_walk(grid, head)
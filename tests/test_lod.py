@@ -0,0 +1,61 @@
+import dataclasses
+from types import SimpleNamespace
+
+import numpy as np
+
+from src.models.config import *
+from src.models.headless import Simulation, wander
+from src.models.lod import LodScheduler
+from src.models.pathfind import FlowField, normalize
+
+
+def test_budget_holds_ghosts_back_until_the_next_tick():
+    lod = LodScheduler((), (1,), budget=1000)
+    n = 10
+    xs = ys = np.zeros(n)
+    wants = np.ones(n, dtype=bool)
+    grid = SimpleNamespace(searched=0)
+    asked = []
+
+    def ask(i: int) -> None:
+        asked.append(i)
+        grid.searched += 400
+
+    served = lod.dispatch(lod.select(None, xs, ys, wants, np.arange(n)), ask, grid)
+    assert served == 3 and lod.deferred == n - 3 and asked == [0, 1, 2]
+
+    # the rest are owed a search, whether or not they'd ask now
+    chosen = lod.select(None, xs, ys, np.zeros(n, dtype=bool), np.arange(n))
+    assert chosen.tolist() == list(range(served, n))
+
+
+def test_long_search_still_serves_one_ghost():
+    lod = LodScheduler((), (1,), budget=1)
+    chosen = lod.select(None, np.zeros(3), np.zeros(3), np.ones(3, dtype=bool), np.zeros(3))
+    grid = SimpleNamespace(searched=0)
+    assert lod.dispatch(chosen, lambda i: setattr(grid, "searched", grid.searched + 50), grid) == 1
+
+
+def test_tiers_start_at_their_distance(config):
+    lod = LodScheduler((20, 60), (1,))
+    steps = [0, 19, 20, 59, 60, None]  # the last can't reach pacman
+    cells = [(config.grid_size * i, 0) for i in range(len(steps))]
+    lod.field = lambda board: SimpleNamespace(distance={c: n for c, n in zip(cells, steps) if n is not None})
+    xs, ys = np.array(cells, dtype=np.float64).T
+    assert lod.tiers(None, xs, ys).tolist() == [0, 0, 1, 1, 2, 2]
+
+
+def test_tiers_are_counted_from_where_pacman_is(data, config):
+    set_global_config(dataclasses.replace(config, batched_ghosts=True, ghost_count=50, lod_distances=(20, 60),
+                                          path_budget=2000))
+    simulation = Simulation(data, controller=wander)
+    for _ in range(40):
+        simulation.step()
+        board = simulation.board
+        cell = normalize(board.pacman.pos)
+        field = board.lod.field(board)
+        assert field.target == cell and max(field.distance.values()) <= 60
+        assert sum(board.lod.counts) == 50
+
+    full = FlowField(data.boundary, cell)
+    assert all(full.distance[point] == steps for point, steps in field.distance.items())
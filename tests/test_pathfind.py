@@ -0,0 +1,135 @@
+import heapq
+import math
+import random
+
+import dataclasses
+
+import pytest
+
+from src.models.board import load_board_data
+from src.models.config import *
+from src.models.pathfind import SortingPath, FlowField, PathCache, reconstruct_path
+
+from tests.conftest import vertex_pairs, is_walk
+
+
+def baseline_a_star(vertices, start, goal, h: SortingPath) -> list:
+    """Grid._a_star as it was before the rewrite, linear scans and all"""
+    stack = []
+    came_from = {}
+    g_score = {start: 0}
+    f_score = {start: h.heuristic(start, goal)}
+    heapq.heappush(stack, (f_score[start], start))
+    while len(stack):
+        current = heapq.heappop(stack)[-1]
+        if current == goal:
+            return reconstruct_path(came_from, current)
+        for i, x in enumerate(stack):
+            if x[-1] == current:
+                stack.pop(i)
+                break
+        if current not in vertices:
+            continue
+        for neighbor in vertices[current].valid_vertices:
+            tentative_score = g_score.get(current, math.inf) + h.distance(current, neighbor)
+            if tentative_score < g_score.get(neighbor, math.inf):
+                came_from[neighbor] = current
+                g_score[neighbor] = tentative_score
+                f_score[neighbor] = tentative_score + h.heuristic(neighbor, goal)
+                if neighbor not in [i[-1] for i in stack]:
+                    heapq.heappush(stack, (f_score.get(neighbor, math.inf), neighbor))
+    return []
+
+
+def shortest(grid, start, goal) -> int:
+    """steps of a shortest path, -1 if there is none"""
+    return FlowField(grid, goal).distance.get(start, -1)
+
+
+def sink_pairs(grid, count: int) -> list:
+    """vertices paired with points that are only ever a neighbour, never a vertex themselves"""
+    rng = random.Random(1)
+    sinks = sorted({n for v in grid._vertices.values() for n in v.valid_vertices} - set(grid._vertices))  # NOQA
+    vertices = list(grid._vertices)  # NOQA
+    return [(rng.choice(vertices), rng.choice(sinks)) for _ in range(count)]
+
+
+@pytest.mark.parametrize("pairs", ["vertices", "sinks"])
+def test_a_star_matches_baseline_cost(data, pairs):
+    grid = data.boundary
+    chosen = vertex_pairs(grid, 40) if pairs == "vertices" else sink_pairs(grid, 20)
+    assert chosen
+    for start, goal in chosen:
+        path = grid._a_star(start, goal, SortingPath.FARTHEST)
+        old = baseline_a_star(grid._vertices, start, goal, SortingPath.FARTHEST)  # NOQA
+        assert len(path) == len(old)
+        if path:
+            assert path[0] == start and path[-1] == goal and is_walk(grid, path)
+
+
+def test_a_star_is_shortest(data):
+    # the old CLOSEST search could return a longer path than needed, the new one never does
+    grid = data.boundary
+    for start, goal in vertex_pairs(grid, 30, seed=2):
+        for mode in SortingPath:
+            path = grid._a_star(start, goal, mode)
+            assert len(path) - 1 == shortest(grid, start, goal)
+            assert len(path) <= len(baseline_a_star(grid._vertices, start, goal, mode)) or not path  # NOQA
+
+
+def test_a_star_goal_off_the_grid(data):
+    grid = data.boundary
+    start = next(iter(grid._vertices))  # NOQA
+    assert grid._a_star(start, (-10, -10), SortingPath.FARTHEST) == []
+    assert grid._a_star(start, start, SortingPath.FARTHEST) == [start]
+
+
+def test_flow_field_matches_a_star(data):
+    grid = data.boundary
+    pairs = vertex_pairs(grid, 60, seed=3)
+    for goal in {goal for _, goal in pairs[:5]}:
+        field = FlowField(grid, goal)
+        for start, _ in pairs:
+            path = field.path(start)
+            assert len(path) == len(grid._a_star(start, goal, SortingPath.CLOSEST))  # NOQA
+            if path:
+                assert path[0] == start and path[-1] == goal and is_walk(grid, path)
+
+
+def test_path_cache_evicts_the_least_recently_used():
+    cache = PathCache(2)
+    a, b, c = (((0, 0), (i, i), SortingPath.FARTHEST) for i in range(3))
+    cache.put(a, [(0, 0)])
+    cache.put(b, [(1, 1)])
+    assert cache.get(a) == [(0, 0)]  # now b is the oldest
+    cache.put(c, [(2, 2)])
+    assert cache.get(b) is None and cache.get(a) == [(0, 0)] and cache.get(c) == [(2, 2)]
+    assert (cache.hits, cache.misses, cache.evictions) == (3, 1, 1)
+
+
+def test_get_path_caches_up_to_path_cache_size(config):
+    set_global_config(dataclasses.replace(config, path_cache_size=3))
+    grid = load_board_data().boundary  # its own grid, the session's is left without a cache
+    pairs = vertex_pairs(grid, 4, seed=8)
+    paths = [grid.get_path(start, goal) for start, goal in pairs]
+    assert (grid.cache.hits, grid.cache.misses) == (0, 4)
+
+    for (start, goal), path in zip(pairs[1:], paths[1:]):
+        assert grid.get_path(start, goal) == path
+    assert grid.cache.hits == 3
+    grid.get_path(*pairs[0])  # the first was evicted by the fourth
+    assert grid.cache.misses == 5
+
+
+def test_cached_paths_are_copies(config):
+    set_global_config(dataclasses.replace(config, path_cache_size=4))
+    grid = load_board_data().boundary
+    (start, goal), = vertex_pairs(grid, 1, seed=2)
+    path = grid.get_path(start, goal)
+    expected = list(path)
+    assert expected
+    path.clear()  # ghosts consume their moves in place
+    hit = grid.get_path(start, goal)
+    assert hit == expected and grid.cache.hits == 1
+    hit.pop()
+    assert grid.get_path(start, goal) == expected
@@ -0,0 +1,106 @@
+import pytest
+
+from src.models.config import *
+from src.models.corridors import CorridorGraph
+from src.models.hierarchy import Hierarchy
+from src.models.maze import generate_maze
+from src.models.pathfind import Grid, PathCache, SortingPath
+from src.models.pathservice import PathService
+from src.models.profiling import profiler
+
+from tests.conftest import vertex_pairs
+
+
+def test_workers_find_the_paths_grid_does(data):
+    grid = data.boundary
+    pairs = vertex_pairs(grid, 20, seed=5)
+    owners = [object() for _ in pairs]  # kept alive, a slot is found by the owner's id
+    with PathService(grid, processes=2) as service:
+        requests = [service.request(owner, start, goal) for owner, (start, goal) in zip(owners, pairs)]
+        for request, (start, goal) in zip(requests, pairs):
+            assert request.get() == grid._a_star(start, goal, SortingPath.FARTHEST)  # NOQA
+
+
+def test_asking_again_supersedes(data):
+    grid = data.boundary
+    (start, goal), (other, _) = vertex_pairs(grid, 2, seed=6)
+    owner = object()
+    with PathService(grid, processes=1) as service:
+        first = service.request(owner, start, goal)
+        second = service.request(owner, other, goal)
+        assert first.is_superseded
+        assert second.get() == grid._a_star(other, goal, SortingPath.FARTHEST)  # NOQA
+        if not first.done:
+            with pytest.raises(ValueError):
+                first.get()
+
+
+def test_a_star_gives_up_when_cancelled(data):
+    grid = data.boundary
+    start, goal = vertex_pairs(grid, 1, seed=7)[0]
+    assert grid._a_star(start, goal, SortingPath.FARTHEST, lambda: True) is None  # NOQA
+
+
+def test_latency_recorded_under_get_path(data):
+    grid = data.boundary
+    start, goal = vertex_pairs(grid, 1, seed=8)[0]
+    owner = object()
+    profiler.enabled = True
+    try:
+        before = profiler.summary().get("grid.get_path", {}).get("count", 0)
+        with PathService(grid, processes=1) as service:
+            service.request(owner, start, goal).get()
+        assert profiler.summary()["grid.get_path"]["count"] == before + 1
+    finally:
+        profiler.enabled = False
+
+
+@pytest.fixture(scope="module")
+def maze_grid() -> Grid:
+    return BoardData.from_surface(generate_maze((300, 300), seed=4).information).boundary
+
+
+@pytest.mark.parametrize("mode", ["tables", "hierarchy", "corridors"])
+def test_workers_search_the_way_the_grid_does(maze_grid, mode):
+    grid = Grid.from_arrays(*maze_grid.to_arrays(), maze_grid.grid_size)
+    if mode == "tables":
+        grid.precompute()
+    elif mode == "hierarchy":
+        grid.hierarchy = Hierarchy(grid, 4, 2)
+    else:
+        grid.corridors = CorridorGraph(grid)
+    pairs = vertex_pairs(grid, 20, seed=11)
+    owners = [object() for _ in pairs]
+    with PathService(grid, processes=2) as service:
+        requests = [service.request(owner, start, goal) for owner, (start, goal) in zip(owners, pairs)]
+        for request, (start, goal) in zip(requests, pairs):
+            assert request.get() == grid.get_path(start, goal)
+
+
+def test_cache_is_looked_up_before_the_workers(data):
+    grid = Grid.from_arrays(*data.boundary.to_arrays(), data.boundary.grid_size)
+    grid.cache = PathCache(8)
+    (start, goal), = vertex_pairs(grid, 1, seed=12)
+    owner = object()
+    with PathService(grid, processes=1) as service:
+        path = service.request(owner, start, goal).get()
+        again = service.request(owner, start, goal)
+        assert again.done and again.get() == path
+    assert (grid.cache.hits, grid.cache.misses) == (1, 1)
+
+
+def test_requests_outlive_the_service(data):
+    grid = data.boundary
+    (start, goal), (other, _) = vertex_pairs(grid, 2, seed=13)
+    owner = object()
+    service = PathService(grid, processes=1)
+    first = service.request(owner, start, goal)
+    second = service.request(owner, other, goal)
+    service.close()
+    assert first.is_superseded and not second.is_superseded
+    if not second.ready():
+        with pytest.raises(ValueError):
+            second.get()
+    with pytest.raises(ValueError):
+        service.request(owner, start, goal)
+    service.close()
@@ -0,0 +1,32 @@
+import numpy as np
+import pytest
+
+from src.models.config import *
+from src.models.maze import generate_maze
+from src.models.pathfind import SortingPath
+
+from tests.conftest import vertex_pairs, is_walk
+
+
+@pytest.fixture(scope="module")
+def maze_data() -> BoardData:
+    return BoardData.from_surface(generate_maze((300, 300), seed=4).information)
+
+
+def test_tables_match_a_star(maze_data, tmp_path):
+    grid = maze_data.boundary
+    grid.precompute(tmp_path / "tables.npz", "key")
+    for start, goal in vertex_pairs(grid, 200):
+        path = grid.get_path(start, goal)
+        assert len(path) == len(grid._a_star(start, goal, SortingPath.FARTHEST))  # NOQA
+        assert path[0] == start and path[-1] == goal and is_walk(grid, path)
+
+
+def test_tables_rebuilt_for_another_key(maze_data, tmp_path):
+    grid = maze_data.boundary
+    path = tmp_path / "tables.npz"
+    grid.precompute(path, "old")
+    grid.precompute(path, "new")
+    with np.load(path) as tables:
+        assert str(tables["key"]) == "new"
+        assert (tables["distances"] == grid._distances).all()  # NOQA
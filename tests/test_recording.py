@@ -0,0 +1,48 @@
+import dataclasses
+import random
+
+import pygame as pg
+import pytest
+
+from src.models.clock import TickClock
+from src.models.config import *
+from src.models.entity import ImmediatePool
+from src.models.headless import Simulation
+from src.models.recording import Recorder, DeferredPool, read_recording, replay
+
+KEYS = (pg.K_a, pg.K_w, pg.K_d, pg.K_s)
+
+
+def positions(board) -> list:
+    return [board.pacman.pos, *(ghost.pos for ghost in board.ghosts)]
+
+
+@pytest.mark.parametrize("scheduled", [False, True], ids=["every ghost", "path budget"])
+def test_replay_reaches_the_recorded_positions(tmp_path, config, scheduled):
+    if scheduled:  # which ghosts search in a tick has to come out the same when replayed
+        config = dataclasses.replace(config, lod_distances=(20, 60), lod_repath_every=(1,), path_budget=2000)
+        set_global_config(config)
+    path = tmp_path / "game.log"
+    seed = 1234
+    random.seed(seed)
+    recorder = Recorder(path, seed, config)
+    clock = TickClock(1000 / config.tick_rate)
+    simulation = Simulation(clock=clock, pool=DeferredPool(ImmediatePool(), clock, debug().path_delay_ticks))
+    presses = random.Random(0)
+    held = 0
+    while simulation.ticks < 400 and not simulation.board.is_over:
+        if simulation.ticks % 25 == 0:  # keys are pressed between updates, as the window handles events
+            key = presses.choice(KEYS)
+            recorder.key(simulation.ticks, key)
+            simulation.board.on_event(pg.event.Event(pg.KEYDOWN, key=key))
+        simulation.step()
+        held += simulation.board.lod.deferred if scheduled else 0
+    recorder.close(simulation.ticks)
+    assert held or not scheduled  # the budget did hold ghosts back
+
+    recording = read_recording(path)
+    assert recording.seed == seed and recording.end == simulation.ticks
+    replayed = replay(recording)
+    assert replayed.ticks == simulation.ticks
+    assert positions(replayed.board) == positions(simulation.board)
+    assert replayed.board.is_over == simulation.board.is_over
@@ -0,0 +1,74 @@
+import dataclasses
+import random
+
+import numpy as np
+import pygame as pg
+import pytest
+
+from src.models.config import *
+from src.models.entity import SimpleSprite
+from src.models.headless import Simulation, wander
+from src.models.renderer import PickupLayer, Renderer
+
+
+def pixels(surface: pg.Surface) -> np.ndarray:
+    return np.dstack((pg.surfarray.array3d(surface), pg.surfarray.array_alpha(surface)))
+
+
+def test_pickup_layer_matches_blitting_each_sprite(data):
+    sprites = [SimpleSprite.scatter_at(p) for p in data.scatter_points] + \
+              [SimpleSprite.point_at(p) for p in data.points_points]
+    size = (1150, 500)
+    eaten = random.Random(0).sample(sprites, 40)
+
+    layer = PickupLayer(size)
+    layer.build(sprites)
+    for sprite in eaten:
+        layer.erase(sprite)
+    drawn = pg.Surface(size, flags=pg.SRCALPHA)
+    drawn.fill((10, 20, 30, 255))
+    layer.draw(drawn)
+
+    expected = pg.Surface(size, flags=pg.SRCALPHA)
+    expected.fill((10, 20, 30, 255))
+    for sprite in sprites:
+        if sprite not in eaten:
+            expected.blit(sprite.surface, sprite.pos)
+    assert np.array_equal(pixels(drawn), pixels(expected))
+    assert sorted(map(tuple, layer.take_erased())) == sorted(tuple(s.rect) for s in eaten)
+
+
+@pytest.fixture
+def display(config):
+    pg.display.init()
+    display = pg.display.set_mode(config.screen_dimensions)
+    yield display
+    pg.display.quit()
+
+
+def full_redraw(board, size: tuple[int, int]) -> np.ndarray:
+    expected = pg.Surface(size)
+    expected.fill((255, 255, 255))
+    expected.blit(board.get_surface(), (0, 0))
+    return pg.surfarray.array3d(expected)
+
+
+@pytest.mark.parametrize("paths_and_grid", [False, True])
+def test_dirty_rects_match_a_full_redraw(data, config, display, paths_and_grid):
+    # a short scatter, so the ghosts turn, flash and chase again within the test
+    set_global_config(dataclasses.replace(config, scatter_duration=1500,
+                                          debug=Debug(draw_ghost_path=paths_and_grid, show_grid=paths_and_grid)))
+    random.seed(3)
+    simulation = Simulation(data, controller=wander)
+    board = simulation.board
+    renderer = Renderer(display, board)
+    modes = [board.mode]
+    while simulation.ticks < 160 and not board.is_over:
+        if simulation.ticks == 30:
+            board.pacman.pos = data.scatter_points[0]  # onto a scatter pickup
+        simulation.step()
+        renderer.draw()
+        if board.mode != modes[-1]:
+            modes.append(board.mode)
+        assert np.array_equal(pg.surfarray.array3d(display), full_redraw(board, display.get_size())), simulation.ticks
+    assert modes == ["chase", "scatter", "chase"]
@@ -0,0 +1,79 @@
+import dataclasses
+import random
+
+import numpy as np
+import pytest
+
+from src.models.config import *
+from src.models.entity import Ghost
+from src.models.headless import Simulation, wander
+from src.models.pathfind import FlowField, normalize, SortingPath
+from src.models.swarm import _DIRECTIONS  # NOQA
+
+from tests.conftest import is_walk, vertex_pairs
+
+
+def positions_per_tick(data, ticks: int) -> list[list[Point]]:
+    random.seed(1)
+    simulation = Simulation(data, controller=wander)
+    positions = []
+    while simulation.ticks < ticks and not simulation.board.is_over:
+        simulation.step()
+        positions.append([simulation.board.pacman.pos, *(ghost.pos for ghost in simulation.board.ghosts)])
+    return positions
+
+
+def test_swarm_moves_like_ghosts(data, config):
+    ghosts = positions_per_tick(data, 600)
+    set_global_config(dataclasses.replace(config, batched_ghosts=True))
+    assert positions_per_tick(data, 600) == ghosts
+
+
+@pytest.mark.parametrize("speed", [1.25, 3, 7.5])
+def test_swarm_steps_like_advance_if_able(data, config, speed):
+    set_global_config(dataclasses.replace(config, batched_ghosts=True, ghost_count=200))
+    board = Simulation(data).board
+    swarm = board.swarm
+    ghost = Ghost.ghosts_from_data(data)[0]
+    ghost.change_speed(speed)
+    walkable = board.walkable(ghost.collision_mask, True)
+    rng = random.Random(4)
+    spots = np.argwhere(walkable).tolist()
+    starts = [rng.choice(spots) for _ in swarm.views]
+    directions = [rng.choice(("up", "down", "left", "right")) for _ in swarm.views]
+
+    assert ghost.collision_mask is swarm.views[0].mask  # the first of both is the first configured sprite
+    swarm._grid[:] = swarm._grid[0]  # NOQA
+    swarm.speed[:] = speed
+    swarm.x[:], swarm.y[:] = zip(*starts)
+    for i, direction in enumerate(directions):
+        swarm._steer(np.array([i]), np.array([_DIRECTIONS.index(direction)]))  # NOQA
+    full = swarm._advance(np.arange(len(swarm)), swarm.walkable(board))  # NOQA
+
+    for i, (start, direction) in enumerate(zip(starts, directions)):
+        ghost.pos = tuple(map(float, start))
+        ghost.change_direction(direction)
+        assert ghost.advance_if_able(board) == full[i]
+        assert ghost.pos == swarm.views[i].pos
+    assert full.any() and not full.all()
+
+
+def test_shared_cells_are_asked_for_often_enough(data, config):
+    set_global_config(dataclasses.replace(config, batched_ghosts=True, path_batch_size=2))
+    board = Simulation(data).board
+    (a, b), = vertex_pairs(data.boundary, 1, seed=5)
+    assert board.swarm._shared_cells(board, [a, b, a]) == {normalize(a)}  # NOQA
+
+    swarm = board.swarm
+    swarm._path_find_to(board, 0, a, FlowField(data.boundary, normalize(a)))  # NOQA
+    path = swarm.threads[0].get()
+    assert len(path) == len(data.boundary._a_star(normalize(swarm.views[0].pos), a, SortingPath.CLOSEST))  # NOQA
+
+
+def test_batched_paths_are_walks(data, config):
+    set_global_config(dataclasses.replace(config, batched_ghosts=True, ghost_count=100, path_batch_size=1))
+    simulation = Simulation(data, controller=wander)
+    simulation.run(300)
+    swarm = simulation.board.swarm
+    assert all(is_walk(data.boundary, moves) for moves in swarm.moves)
+    assert any(len(moves) for moves in swarm.moves)
@@ -0,0 +1,19 @@
+import dataclasses
+
+from src.models import tournament
+from src.models.config import *
+
+
+def test_boards_shared_only_between_the_same_searches(config):
+    path = config.board.information_path
+    plain = tournament._board_data(path)  # NOQA
+    assert tournament._board_data(path) is plain  # NOQA
+
+    set_global_config(dataclasses.replace(config, contract_corridors=True))
+    contracted = tournament._board_data(path)  # NOQA
+    assert contracted is not plain
+    assert contracted.boundary.corridors is not None and plain.boundary.corridors is None
+
+    set_global_config(dataclasses.replace(config, path_cache_size=100))
+    assert tournament._board_data(path).boundary.cache is not None  # NOQA
+    assert plain.boundary.cache is None